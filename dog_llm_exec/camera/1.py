@@ -1,19 +1,25 @@
+import sys
+
 import numpy as np
 
 # 给定数据
 angles = np.array([-124, 150, -164, 145])
 temperatures = np.array([0, -30, 57, 38])
 
-# 进行线性回归
-coefficients = np.polyfit(angles, temperatures, 1)  # 1表示线性拟合
-a, b = coefficients
+# 进行线性回归：输入是固定的标定点，只在导入时拟合一次并缓存系数
+_B, _A = np.polynomial.polynomial.polyfit(angles, temperatures, 1)  # 1表示线性拟合，系数按升幂排列
+
+
+def angle_to_temp(x):
+    """按缓存的拟合系数把角度映射为温度，标量和 ndarray 均可"""
+    return _A * x + _B
+
 
 # 输出结果
-print(f'线性拟合公式: Temperature = {a:.4f} * Angle + {b:.4f}')
+print(f'线性拟合公式: Temperature = {_A:.4f} * Angle + {_B:.4f}')
 
 # 测试拟合结果
 test_angles = np.array([-124, 150, -164, 145])
-predicted_temperatures = -0.2431 * test_angles + 27.8311
+predicted_temperatures = angle_to_temp(test_angles)
 
-for angle, temp in zip(test_angles, predicted_temperatures):
-    print(f'角度: {angle}, 预测温度: {temp:.2f}度')
+np.savetxt(sys.stdout, np.column_stack([test_angles, predicted_temperatures]), fmt='角度: %d, 预测温度: %.2f度')
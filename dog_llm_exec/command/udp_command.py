@@ -4,8 +4,29 @@
 import ctypes
 import struct
 import inspect
+import sys
+import types
+from enum import IntEnum
+
+# numpy 为可选依赖：可用时关节向量直接以零拷贝 ndarray 视图解析，否则回退到 struct
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 预编译的报文格式，配合 unpack_from 直接在 memoryview 上按偏移解析，避免切片拷贝
+_HEAD = struct.Struct('<III')           # 指令码, 指令值, 指令类型
+_12D = struct.Struct('<12d')            # 12个关节的角度/速度
+
+def _unpack_joint_vector(data):
+    """解析报文头之后的12个小端双精度数：有 numpy 时返回零拷贝视图，否则返回列表"""
+    if np is not None:
+        return np.frombuffer(data, dtype='<f8', count=12, offset=12)
+    return list(_12D.unpack_from(data, 12))
 
 class CommandHead:
+    __slots__ = ('code', 'parameters_size', 'type_')
+
     def __init__(self, code=0, parameters_size=0, type_=0):
         self.code = code                                        # 指令码
         self.parameters_size = parameters_size                  # 指令值
@@ -23,6 +44,8 @@ class Command:
         self.data = data
 
 class JointStateReceived(CommandHead):
+    __slots__ = ('data',)
+
     def __init__(self, data):
         """
 
@@ -37,44 +60,88 @@ class JointStateReceived(CommandHead):
 
         """
         self.data = data        # 关节的状态数据，全部接受，再由code来决定分配给谁
-        CommandHead.code, = struct.unpack('<I', self.data[:4])
+        # unpack_from 直接按偏移读取任意缓冲区（bytes/bytearray/memoryview），不需要再包一层 memoryview
+        self.code, self.parameters_size, self.type_ = _HEAD.unpack_from(data, 0)
 
 
 class JointAngle(CommandHead):
+    __slots__ = ('_data', '_joint_angles')
+
     def __init__(self, joint_state_received):
-        # 特定于关节角度的数据解析
-        *self.joint_angles, = struct.unpack('<12d', joint_state_received.data[12:])
+        # 特定于关节角度的数据解析：首次访问时才解析（ndarray 视图与接收缓冲区共享内存）
+        self._data = joint_state_received.data
+        self._joint_angles = None
+
+    @property
+    def joint_angles(self):
+        if self._joint_angles is None:
+            self._joint_angles = _unpack_joint_vector(self._data)
+        return self._joint_angles
 
 class JointSpeed(CommandHead):
+    __slots__ = ('_data', '_joint_speeds')
+
     def __init__(self, joint_state_received):
-        # 特定于关节速度的数据解析
-        *self.joint_speeds, = struct.unpack('<12d', joint_state_received.data[12:])
+        # 特定于关节速度的数据解析：首次访问时才解析（ndarray 视图与接收缓冲区共享内存）
+        self._data = joint_state_received.data
+        self._joint_speeds = None
+
+    @property
+    def joint_speeds(self):
+        if self._joint_speeds is None:
+            self._joint_speeds = _unpack_joint_vector(self._data)
+        return self._joint_speeds
+
+class _RobotStateRaw(ctypes.LittleEndianStructure):
+    """状态报文(212字节)的线上布局，按字节紧凑排列，直接映射到报文缓冲区上"""
+    _pack_ = 1
+    _fields_ = [
+        ('code', ctypes.c_uint32),                          # 指令码
+        ('parameters_size', ctypes.c_uint32),               # 指令值
+        ('type_', ctypes.c_uint32),                         # 指令类型
+        ('robot_basic_state', ctypes.c_uint32),             # 机器人基本运动状态
+        ('robot_gait_state', ctypes.c_uint32),              # 机器人步态信息
+        ('rpy', ctypes.c_double * 3),                       # IMU角度
+        ('rpy_vel', ctypes.c_double * 3),                   # IMU角速度
+        ('xyz_acc', ctypes.c_double * 3),                   # IMU加速度
+        ('pos_world', ctypes.c_double * 3),                 # 机器人在世界坐标系中的位置
+        ('vel_world', ctypes.c_double * 3),                 # 机器人在世界坐标系中的速度
+        ('vel_body', ctypes.c_double * 3),                  # 机器人在体坐标系中的速度
+        ('touch_down_and_stair_trot', ctypes.c_uint32),     # 此功能暂时未激活。此数据仅用于占位
+        ('is_charging', ctypes.c_int8),                     # 暂时未开放
+        ('error_state', ctypes.c_uint32),                   # 暂时未开放
+        ('_pad', ctypes.c_uint8 * 3),
+        ('robot_motion_state', ctypes.c_int32),             # 机器人动作状态
+        ('_pad2', ctypes.c_uint8 * 16),
+        ('distance_ahead', ctypes.c_double),                # 雷达前方的距离
+        ('rear_distance', ctypes.c_double),                 # 雷达后方的距离
+    ]
+
+assert ctypes.sizeof(_RobotStateRaw) == 212
+
+
+def _raw_field(name):
+    return property(lambda self: getattr(self._raw, name))
+
 
 class RobotState(CommandHead):
+    __slots__ = ('_raw',)
+
     def __init__(self, data):
-        
-        CommandHead.code, = struct.unpack('<I', data[:4])
-        CommandHead.parameters_size, = struct.unpack('<I', data[4:8])
-        CommandHead.type_, = struct.unpack('<I', data[8:12])
-        self.robot_basic_state, = struct.unpack('<I', data[12:16])                 # 机器人基本运动状态
-        self.robot_gait_state, = struct.unpack('<I', data[16:20])                  # 机器人步态信息
-        self.robot_motion_state, = struct.unpack('<i', data[176:180])              # 机器人动作状态
-        self.distance_ahead, = struct.unpack('<d', data[-16:-8])                   # 雷达前方的距离
-        self.rear_distance, = struct.unpack('<d', data[-8:])
-        
-
-        # self.rpy = struct.unpack('<3d', data[20:44])                               # IMU角度
-        # self.rpy_vel = struct.unpack('<3d', data[44:68])                           # IMU角速度
-        # self.xyz_acc = struct.unpack('<3d', data[68:92])                           # IMU加速度
-        # self.pos_world = struct.unpack('<3d', data[92:116])                        # 机器人在世界坐标系中的位置
-        # self.vel_world = struct.unpack('<3d', data[116:140])                       # 机器人在世界坐标系中的速度
-        # self.vel_body = struct.unpack('<3d', data[140:164])                        # 机器人在体坐标系中的速度
-        # self.touch_down_and_stair_trot = struct.unpack('<I', data[164:168])        # 此功能暂时未激活。此数据仅用于占位
-        # self.is_charging = struct.unpack('<b', data[168:169])                      # 暂时未开放
-        # self.error_state = struct.unpack('<I', data[169:173])                      # 暂时未开放
-
-
-dog_actions = {
+        # 一次内存拷贝即完成解析：接收缓冲区会被复用，因此不直接 from_buffer 共享内存
+        self._raw = _RobotStateRaw.from_buffer_copy(data)
+
+    code = _raw_field('code')
+    parameters_size = _raw_field('parameters_size')
+    type_ = _raw_field('type_')
+    robot_basic_state = _raw_field('robot_basic_state')
+    robot_gait_state = _raw_field('robot_gait_state')
+    robot_motion_state = _raw_field('robot_motion_state')
+    distance_ahead = _raw_field('distance_ahead')
+    rear_distance = _raw_field('rear_distance')
+
+
+_raw_dog_actions = {
     # 简单指令
     "ACTION_STAND_DOWN": 0x21010202,                    # 起立/趴下 0x21010202 - 0 在趴下状态和初始站立状态之间轮流切换
     "ACTION_ZERO": 0x21010C05,                          # 回零 0x21010C05 - 0 初始化机器人关节
@@ -94,18 +161,11 @@ dog_actions = {
     "ACTION_JUMP_FORWARD": 0x2101050B,                  # 向前跳 0x2101050B - 0 趴下状态
     "ACTION_TWIST_JUMP": 0x2101020D,                    # 扭身跳 0x2101020D - 0 处于力控状态（静止站立）
 
-    # 原地模式
+    # 原地模式（该模式下的调整指令见 _raw_in_place_actions）
     "ACTION_In_place_mode": 0x21010D05,                 # 原地模式: 0x21010D05 - 0
-    "ACTION_Adjust_the_roll_angle": 0x21010131,         # 调整横滚角: 0x21010131 0 [-12553,12553]，取正值时向右翻滚
-    "ACTION_Adjust_the_pitch_angle": 0x21010130,        # 调整俯仰角: 0x21010130 0 [-6553,6553]，取正值时低头
-    "ACTION_Adjust_the_height_of_body": 0x21010102,     # 调整身体高度: 0x21010102 0 [-20000,20000]，取正值时抬高身体
-    "ACTION_Adjust_the_yaw_angle": 0x21010135,          # 调整偏航角: 0x21010135 0 [-9553,9553]，取正值时向右旋转
-    
-    # 移动模式
+
+    # 移动模式（该模式下的移动指令见 _raw_mobile_actions）
     "ACTION_Mobile_mode": 0x21010D06,                   # 移动模式: 0x21010D06 - 0
-    "ACTION_Translate_left_and_right": 0x21010131,      # 左右平移: 0x21010131 0 [-12553,12553]，指定机器人 y 轴上的期望线速度，正值向右
-    "ACTION_pan_back_and_forth": 0x21010130,            # 前后平移: 0x21010130 0 [-6553,6553]，指定机器人 x 轴上的期望线速度，正值向前
-    "ACTION_turn_left_and_right": 0x21010135,           # 左右转弯: 0x21010135 0 [-9553,9553]，指定机器人的期望角速度，正值向右转
 
     # 自主模式 
     "Autonomous_mode": 0x21010C03,                      # 自主模式 0x21010C03 - 0 使机器人从手动模式切入自主模式
@@ -119,6 +179,98 @@ dog_actions = {
                                                         # 当障碍物距离大于 4.50m 时显示为 4.50m。
 }
 
+# 原地模式与移动模式复用同一批指令码，含义由当前模式决定，因此按模式拆成两张表，
+# 分发时先按模式选表再直接按名称取码，dog_actions 中只保留与模式无关的指令
+_raw_in_place_actions = {
+    "ACTION_Adjust_the_roll_angle": 0x21010131,         # 调整横滚角: 0x21010131 0 [-12553,12553]，取正值时向右翻滚
+    "ACTION_Adjust_the_pitch_angle": 0x21010130,        # 调整俯仰角: 0x21010130 0 [-6553,6553]，取正值时低头
+    "ACTION_Adjust_the_height_of_body": 0x21010102,     # 调整身体高度: 0x21010102 0 [-20000,20000]，取正值时抬高身体
+    "ACTION_Adjust_the_yaw_angle": 0x21010135,          # 调整偏航角: 0x21010135 0 [-9553,9553]，取正值时向右旋转
+}
+
+_raw_mobile_actions = {
+    "ACTION_Translate_left_and_right": 0x21010131,      # 左右平移: 0x21010131 0 [-12553,12553]，指定机器人 y 轴上的期望线速度，正值向右
+    "ACTION_pan_back_and_forth": 0x21010130,            # 前后平移: 0x21010130 0 [-6553,6553]，指定机器人 x 轴上的期望线速度，正值向前
+    "ACTION_turn_left_and_right": 0x21010135,           # 左右转弯: 0x21010135 0 [-9553,9553]，指定机器人的期望角速度，正值向右转
+}
+
+# 对外只暴露只读视图：键已驻留(intern)，表不可变，可在多线程间无锁共享
+dog_actions = types.MappingProxyType({sys.intern(k): v for k, v in _raw_dog_actions.items()})
+IN_PLACE_ACTIONS = types.MappingProxyType({sys.intern(k): v for k, v in _raw_in_place_actions.items()})
+MOBILE_ACTIONS = types.MappingProxyType({sys.intern(k): v for k, v in _raw_mobile_actions.items()})
+
+# 指令码 -> 名称的反查表（日志/遥测用）。原地模式与移动模式共用 0x21010130/0x21010131/0x21010135，
+# 反查时保留原地模式名称，需要区分模式时请使用 IN_PLACE_ACTIONS / MOBILE_ACTIONS 或下方的 InPlace / Mobile 枚举
+_actions_by_code = {}
+for _table in (dog_actions, IN_PLACE_ACTIONS, MOBILE_ACTIONS):
+    for _name, _code in _table.items():
+        _actions_by_code.setdefault(_code, _name)
+ACTIONS_BY_CODE = types.MappingProxyType(_actions_by_code)
+del _table, _name, _code
+
+def make_opcode_table(entries):
+    """按指令码低16位构建稠密分发表，查表只需一次列表下标访问，无需哈希。
+
+    entries 为 {指令码: 值}；表中每个槽位保存 (完整指令码, 值)，查表时再校验高16位。
+    """
+    table = [None] * 0x10000
+    for code, value in entries.items():
+        slot = code & 0xFFFF
+        if table[slot] is not None and table[slot][0] != code:
+            raise ValueError(f"指令码 {hex(code)} 与 {hex(table[slot][0])} 的低16位冲突")
+        table[slot] = (code, value)
+    return table
+
+def opcode_lookup(table, code, default=None):
+    entry = table[code & 0xFFFF]
+    if entry is None or entry[0] != code:
+        return default
+    return entry[1]
+
+ACTION_NAME_TABLE = make_opcode_table(ACTIONS_BY_CODE)
+
+# 不带参数的指令每次发送的12字节报文都相同，导入时一次性打包好，发送时直接取用
+PACKED_COMMANDS = types.MappingProxyType({
+    code: _HEAD.pack(code, 0, 0)
+    for table in (dog_actions, IN_PLACE_ACTIONS, MOBILE_ACTIONS)
+    for code in table.values()
+})
+
+# 热路径上直接使用枚举成员，避免按字符串查表；
+# 原地模式与移动模式中复用了同一批指令码，因此分在不同的命名空间中
+class Action(IntEnum):
+    STAND_DOWN = 0x21010202                     # 起立/趴下
+    ZERO = 0x21010C05                           # 回零
+    EMERGENCY_STOP = 0x21020C0E                 # 软急停
+    FLATLAND_SLOW_WALK = 0x21010300             # 平地低速步态
+    FLATLAND_MEDIUM_WALK = 0x21010307           # 平地中速步态
+    FLATLAND_FAST_WALK = 0x21010303             # 平地高速步态
+    NORMAL_CRAWL = 0x21010406                   # 正常/匍匐
+    GRASPING_OBSTACLE_WALK = 0x21010402         # 抓地越障步态
+    GENERAL_OBSTACLE_WALK = 0x21010401          # 通用越障步态
+    HIGH_STEP_OBSTACLE_WALK = 0x21010407        # 高踏步越障步态
+    TWIST_BODY = 0x21010204                     # 扭身体
+    ROLL_OVER = 0x21010205                      # 翻身
+    MOONWALK = 0x2101030C                       # 太空步
+    BACKFLIP = 0x21010502                       # 后空翻
+    GREET = 0x21010507                          # 打招呼
+    JUMP_FORWARD = 0x2101050B                   # 向前跳
+    TWIST_JUMP = 0x2101020D                     # 扭身跳
+    IN_PLACE_MODE = 0x21010D05                  # 原地模式
+    MOBILE_MODE = 0x21010D06                    # 移动模式
+    AUTONOMOUS_MODE = 0x21010C03                # 自主模式
+    MANUAL_MODE = 0x21010C02                    # 手动模式
+    RADAR = 0x21012109                          # 超声波雷达
+
 
+class InPlace(IntEnum):
+    ROLL = 0x21010131                           # 调整横滚角 [-12553,12553]
+    PITCH = 0x21010130                          # 调整俯仰角 [-6553,6553]
+    HEIGHT = 0x21010102                         # 调整身体高度 [-20000,20000]
+    YAW = 0x21010135                            # 调整偏航角 [-9553,9553]
 
 
+class Mobile(IntEnum):
+    TRANSLATE_LR = 0x21010131                   # 左右平移 [-12553,12553]
+    PAN_FB = 0x21010130                         # 前后平移 [-6553,6553]
+    TURN_LR = 0x21010135                        # 左右转弯 [-9553,9553]
@@ -12,27 +12,27 @@
 下一步将在该稳定版本上，继续修复动作执行逻辑（如抬头低头、连续移动等）。
 """
 
-import argparse
-import json
+from __future__ import annotations
+
 import logging
 import math
-import os
 import sys
 import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 # ===================================================================
 # 1. 项目内依赖导入 (不再依赖外部文件夹)
 # ===================================================================
-from command.udp_command import RobotState
-from sendcommand.heartbeat import send_udp_heartbeat_once
-from sendcommand.SendToCommand import perform_action
+from command.udp_command import ACTION_NAME_TABLE, Action, InPlace, Mobile, RobotState, opcode_lookup
+from sendcommand.heartbeat import new_heartbeat_buffer, send_udp_heartbeat_prepacked
+from sendcommand.SendToCommand import encode_command
 from socketnetwork import network_utils
+from socketnetwork.network_utils import UdpBatch
 from speeds.sportspeed import go_straight, translate_left_and_right, revolve_left_and_right
-from threading_utils.ThreadTemplates import MyRepeatThread
-from robotstatuswatcher.listener import status_listener
+from threading_utils.ThreadTemplates import UdpScheduler, paced_send
+from robotstatuswatcher.listener import pin_rx_thread, status_poll
 
 # 避障功能（可选）
 try:
@@ -45,6 +45,12 @@ except ImportError:
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(message)s")
 
+# 等待类截止时间统一使用单调时钟整数纳秒，不受系统时间跳变影响（ExecResult 中的时间戳仍为墙上时间）
+_NS = 1_000_000_000
+
+# 连续发送两条指令之间的最小间隔（秒），避免超过运动主机的指令速率
+_MIN_CMD_GAP = 0.05
+
 
 class DogState:
     UNKNOWN = "unknown"
@@ -52,6 +58,18 @@ class DogState:
     LYING = "lying"
 
 
+# 基本状态 -> 姿态分类（参考gesture_main的状态识别逻辑）
+_BASIC_STATE_MAP: Dict[int, str] = {
+    6: DogState.STANDING,   # 基本状态：6=站立
+    1: DogState.LYING,      # 基本状态：1=趴下
+    20: DogState.STANDING,  # 特殊状态：20=打招呼动作状态，但机器人是站立的（参考gesture_main第183行）
+    # 过渡状态：25和5是"打招呼"完成后的过渡状态，应该被识别为站立的过渡状态
+    # 这些状态会自然过渡到[6, 0, 0]，不应该触发恢复流程
+    25: DogState.STANDING,
+    5: DogState.STANDING,
+}
+
+
 @dataclass
 class ExecResult:
     ok: bool
@@ -98,64 +116,75 @@ ACTION_SPECIAL_HANDLING: Dict[int, Dict[str, Any]] = {
 
 # 语义消歧（移动/姿态）
 POSTURE_CODE = {
-    "posture_pitch": 0x21010130,
-    "posture_roll": 0x21010131,
-    "posture_yaw": 0x21010135,
+    "posture_pitch": InPlace.PITCH,
+    "posture_roll": InPlace.ROLL,
+    "posture_yaw": InPlace.YAW,
 }
 MOVE_CODE = {
-    "move_x": 0x21010130,
-    "move_y": 0x21010131,
-    "move_yaw": 0x21010135,
+    "move_x": Mobile.PAN_FB,
+    "move_y": Mobile.TRANSLATE_LR,
+    "move_yaw": Mobile.TURN_LR,
 }
 
 
 class RobotStatusWatcher:
     def __init__(self) -> None:
-        self._lock = threading.Lock()
-        self._latest: Optional[List[int]] = None
+        # 状态更新时 notify_all，等待方在状态变化时立即被唤醒，而不是按固定间隔轮询
+        self._cond = threading.Condition()
+        # 最新状态 (basic, gait, motion)：只整体替换、从不原地修改，读取方可直接共享同一个对象
+        self._latest: Optional[Tuple[int, int, int]] = None
         self._stop = threading.Event()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
     def _loop(self) -> None:
+        # 本线程是状态报文在执行器内的唯一消费者：select 带超时等待，stop() 后最多 100ms 内退出
+        pin_rx_thread()
         while not self._stop.is_set():
             try:
-                st = status_listener()
-                if st:
-                    with self._lock:
-                        self._latest = st
+                st = status_poll(0.1)
             except Exception as e:
                 logging.error(f"状态监听线程异常: {e}")
-                time.sleep(0.5)
+                self._stop.wait(0.5)
+                continue
+            if st:
+                with self._cond:
+                    self._latest = tuple(st)
+                    self._cond.notify_all()
 
     def stop(self) -> None:
         self._stop.set()
 
-    def get_latest(self) -> Optional[List[int]]:
-        with self._lock:
-            return list(self._latest) if self._latest else None
+    def get_latest(self) -> Optional[Tuple[int, int, int]]:
+        with self._cond:
+            return self._latest
 
     def wait_until(self, predicate, timeout: float, interval: float = 0.05) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            st = self.get_latest()
-            if st is not None and predicate(st):
-                return True
-            time.sleep(interval)
-        return False
+        """等待最新状态满足 predicate。interval 仅为兼容旧调用保留，不再轮询。"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._latest is not None and predicate(self._latest), timeout=timeout)
 
 
 class DogCommandExecutor:
     def __init__(self, dog_ip: str, dog_port: int = 43893, enable_obstacle_avoidance: bool = True):
         self.sfd, self.target_address = network_utils.setup_socket_and_address(dog_ip, dog_port)
-
-        self._heartbeat_thread = MyRepeatThread("HeartbeatThread", self._safe_send_heartbeat, 0.25, None)
-        self._heartbeat_thread.start()
+        # UDP connect 只记录默认目标地址：心跳可直接 send，免去每次的目标地址解析；sendto 仍照常可用
+        self.sfd.connect(self.target_address)
+        self._hb_buf = new_heartbeat_buffer()
+        # 按 (指令码, 参数) 缓存已编码的报文，持续移动等重复发送同一指令时不再重复编码
+        self._pkt_cache: Dict[Tuple[int, int], bytes] = {}
+        # x / y / yaw 三轴归零指令，预先打包好，停止时一次系统调用批量发出
+        self._axes_zero_batch = UdpBatch([self._cached_packet(c, 0) for c in (Mobile.PAN_FB, Mobile.TRANSLATE_LR, Mobile.TURN_LR)])
+
+        # 心跳与持续移动指令共用一个调度线程
+        self._scheduler = UdpScheduler()
+        self._scheduler.start()
+        self._heartbeat_task = self._scheduler.schedule_periodic("HeartbeatTask", self._safe_send_heartbeat, 0.25, None)
 
         self._status = RobotStatusWatcher()
         self._cur_state: str = DogState.UNKNOWN
 
-        self._perform_action(0x21010C02)  # 手动模式
+        self._perform_action_fast(Action.MANUAL_MODE)  # 手动模式
         time.sleep(0.1)
         self._refresh_state(timeout=3.0)
         
@@ -179,8 +208,9 @@ class DogCommandExecutor:
         try: self._status.stop()
         except: pass
         try:
-            self._heartbeat_thread.stop()
-            self._heartbeat_thread.join(timeout=1.0)
+            self._heartbeat_task.stop()
+            self._heartbeat_task.join(timeout=1.0)
+            self._scheduler.stop()
         except: pass
         try:
             if self._obstacle_manager:
@@ -191,50 +221,63 @@ class DogCommandExecutor:
 
     def _safe_send_heartbeat(self) -> None:
         try:
-            send_udp_heartbeat_once(self.sfd, self.target_address)
+            send_udp_heartbeat_prepacked(self.sfd, self._hb_buf)
         except OSError:
-            logging.warning("心跳发送失败 (socket可能已关闭), 停止心跳线程。")
-            if self._heartbeat_thread:
-                self._heartbeat_thread.stop()
+            logging.warning("心跳发送失败 (socket可能已关闭), 停止心跳任务。")
+            self._heartbeat_task.stop()
+
+    def _perform_action_fast(self, code: int, param: int = 0) -> None:
+        """内部调用专用：参数已确定为 int，不再做类型转换，直接发送缓存的报文"""
+        self._send(self._cached_packet(code, param))
+
+    def _cached_packet(self, code: int, param: int) -> bytes:
+        key = (code, param)
+        pkt = self._pkt_cache.get(key)
+        if pkt is None:
+            if len(self._pkt_cache) >= 256:
+                self._pkt_cache.clear()
+            pkt = self._pkt_cache[key] = encode_command(code, param, 0)
+        return pkt
+
+    def _send(self, pkt) -> None:
+        try:
+            self.sfd.send(pkt)
+        except ConnectionRefusedError:
+            # 已 connect 的 UDP socket 会在本次发送上报告之前的 ICMP 端口不可达（本次报文未发出），重发一次
+            self.sfd.send(pkt)
 
-    def _perform_action(self, code: int, param: int = 0, *_unused) -> None:
-        perform_action(self.sfd, self.target_address, code, int(param), 0)
+    def _send_cached(self, code: int, param: int = 0) -> None:
+        self._send(self._cached_packet(code, int(param)))
 
     def emergency_stop(self) -> None:
-        self._perform_action(0x21020C0E, 0)
+        self._perform_action_fast(Action.EMERGENCY_STOP, 0)
+
+    def _send_axes_zero_batch(self) -> None:
+        """x轴、y轴、yaw轴停止指令合并为一次批量发送"""
+        self._axes_zero_batch.send(self.sfd)
 
     def _send_stop_motion(self, duration: float = 1.5) -> None:
-        """发送全轴停止指令，确保机器人完全停止"""
-        logging.info(f"发送全轴停止指令，持续 {duration} 秒...")
-        stop_time = time.time() + duration
-        while time.time() < stop_time:
-            self._perform_action(0x21010130, 0)  # x轴停止
-            self._perform_action(0x21010131, 0)  # y轴停止
-            self._perform_action(0x21010135, 0)  # yaw轴停止
-            time.sleep(0.1)
-        # 额外等待确保完全稳定（参考precise_control_main的1秒停顿）
-        time.sleep(1.0)
+        """发送全轴停止指令，确认动作状态归零后提前结束，最多持续 duration 秒"""
+        logging.info("发送全轴停止指令，最多持续 %s 秒...", duration)
+        self._send_axes_zero_batch()
+        stop_time = time.monotonic_ns() + int(duration * _NS)
+        while time.monotonic_ns() < stop_time:
+            if self._status.wait_until(lambda s: len(s) >= 3 and int(s[2]) == 0, timeout=min(0.2, max(0, stop_time - time.monotonic_ns()) / _NS)):
+                break
+            # 尚未确认停止，每 200ms 重发一次
+            self._send_axes_zero_batch()
+        # 短暂等待确保完全稳定
+        time.sleep(0.2)
 
     def _classify_state(self, st: List[int]) -> str:
         """分类机器人状态，参考gesture_main的状态识别逻辑"""
-        if len(st) >= 1:
-            basic_state = int(st[0])
-            # 基本状态：6=站立，1=趴下（参考gesture_main）
-            if basic_state == 6: return DogState.STANDING
-            if basic_state == 1: return DogState.LYING
-            # 特殊状态：20=打招呼动作状态，但机器人是站立的（参考gesture_main第183行）
-            if basic_state == 20: return DogState.STANDING
-            # 过渡状态：25和5是"打招呼"完成后的过渡状态，应该被识别为站立的过渡状态
-            # 这些状态会自然过渡到[6, 0, 0]，不应该触发恢复流程
-            if basic_state == 25: return DogState.STANDING
-            if basic_state == 5: return DogState.STANDING
-        return DogState.UNKNOWN
+        return _BASIC_STATE_MAP.get(st[0], DogState.UNKNOWN) if st else DogState.UNKNOWN
 
     def _refresh_state(self, timeout: float = 1.0) -> str:
         ok = self._status.wait_until(lambda s: len(s) >= 3, timeout=timeout)
         latest = self._status.get_latest() if ok else None
         self._cur_state = self._classify_state(latest) if latest else DogState.UNKNOWN
-        logging.info(f"刷新状态完成, 当前: {self._cur_state}, 原始值: {latest}")
+        logging.info("刷新状态完成, 当前: %s, 原始值: %s", self._cur_state, latest)
         return self._cur_state
 
     def _wait_motion_stable(self, timeout: float = 4.0) -> bool:
@@ -247,6 +290,25 @@ class DogCommandExecutor:
             time.sleep(1.0)
         return ok
 
+    def _settle(self, predicate, timeout: float) -> bool:
+        """两条指令之间的等待：至少间隔 _MIN_CMD_GAP，之后一旦状态满足 predicate 立即返回"""
+        time.sleep(_MIN_CMD_GAP)
+        return self._status.wait_until(predicate, timeout=timeout)
+
+    def _already_in(self, target: str) -> bool:
+        """快速路径：状态影子已是目标状态且动作稳定时直接返回 True，不做任何等待"""
+        latest = self._status.get_latest()
+        if latest is not None and len(latest) >= 3 and latest[2] == 0 \
+                and self._classify_state(latest) == target:
+            self._cur_state = target
+            return True
+        return False
+
+    def _wait_status_change(self, timeout: float) -> bool:
+        """等待状态影子出现与当前不同的状态帧（发送指令后用于代替固定等待）"""
+        prev = self._status.get_latest()
+        return self._status.wait_until(lambda s: s != prev, timeout=timeout)
+
     def _wait_for_state(self, target: str, timeout: float) -> bool:
         ok = self._status.wait_until(lambda s: self._classify_state(s) == target, timeout=timeout)
         if ok: self._cur_state = target
@@ -254,15 +316,14 @@ class DogCommandExecutor:
 
     def _wait_for_execution_state(self, target_state: List[int], timeout: float = 10.0) -> bool:
         """等待动作进入执行状态（参考gesture_main.py的状态监听设计）"""
-        logging.info(f"等待动作进入执行状态: {target_state}")
-        ok = self._status.wait_until(
-            lambda s: len(s) >= 3 and s[0] == target_state[0] and s[1] == target_state[1] and s[2] == target_state[2],
-            timeout=timeout
-        )
+        logging.info("等待动作进入执行状态: %s", target_state)
+        # 状态影子固定为 (basic, gait, motion) 三元组，直接整体比较，不再切片
+        t = tuple(target_state)
+        ok = self._status.wait_until(lambda s, t=t: s == t, timeout=timeout)
         if ok:
-            logging.info(f"动作已进入执行状态: {target_state}")
+            logging.info("动作已进入执行状态: %s", target_state)
         else:
-            logging.warning(f"等待动作执行状态 {target_state} 超时")
+            logging.warning("等待动作执行状态 %s 超时", target_state)
         return ok
 
     def _wait_for_action_completion(self, execution_state: List[int], timeout: float = 15.0) -> bool:
@@ -271,52 +332,35 @@ class DogCommandExecutor:
         对于"打招呼"等动作，状态会从执行状态[20,0,0]过渡到[25,0,0]或[5,0,0]，
         最终稳定到[6,0,0]。我们需要等待稳定到[6,0,0]而不是立即尝试恢复。
         """
-        logging.info(f"等待动作执行完成（离开执行状态 {execution_state}）...")
-        deadline = time.time() + timeout
-        in_execution = True
-        
+        logging.info("等待动作执行完成（离开执行状态 %s）...", execution_state)
+        exec_t = tuple(execution_state)
+
         # 先等待一小段时间，确保动作已经开始执行
         time.sleep(0.5)
-        
-        # 等待状态离开执行状态
-        while time.time() < deadline:
-            st = self._status.get_latest()
-            if st is None or len(st) < 3:
-                time.sleep(0.1)
-                continue
-            
-            # 如果状态不再匹配执行状态，说明动作可能已完成
-            if not (st[0] == execution_state[0] and st[1] == execution_state[1] and st[2] == execution_state[2]):
-                if in_execution:
-                    logging.info(f"动作状态已离开执行状态 {execution_state}，当前状态: {st}")
-                    in_execution = False
-                    
-                    # 对于"打招呼"等动作，等待状态稳定到[6,0,0]（站立状态）
-                    # 过渡状态[25,0,0]或[5,0,0]会被识别为STANDING，但我们需要等待稳定
-                    if execution_state == [20, 0, 0]:  # 打招呼动作
-                        logging.info("等待'打招呼'动作稳定到站立状态[6,0,0]...")
-                        # 等待状态稳定到[6,0,0]，最多等待8秒
-                        stable_deadline = time.time() + 8.0
-                        while time.time() < stable_deadline:
-                            st_check = self._status.get_latest()
-                            if st_check and len(st_check) >= 3 and st_check[0] == 6 and st_check[2] == 0:
-                                logging.info(f"动作已稳定到站立状态: {st_check}")
-                                return True
-                            time.sleep(0.1)
-                        # 如果超时，但状态已经是STANDING（过渡状态），也认为完成
-                        if self._classify_state(st) == DogState.STANDING:
-                            logging.info("动作已进入站立过渡状态，继续执行")
-                            return True
-                    else:
-                        # 其他动作：状态离开执行状态后，等待稳定
-                        if self._wait_motion_stable(timeout=5.0):
-                            logging.info("动作执行完成，状态已稳定")
-                            return True
-            
-            time.sleep(0.1)
-        
+
+        # 第一阶段：等待状态离开执行状态（状态更新时即被唤醒，不再按 100ms 轮询）
+        if self._status.wait_until(lambda s, t=exec_t: s != t, timeout=max(0.0, timeout - 0.5)):
+            logging.info("动作状态已离开执行状态 %s，当前状态: %s", execution_state, self._status.get_latest())
+
+            # 第二阶段：对于"打招呼"等动作，等待状态稳定到[6,0,0]（站立状态）
+            # 过渡状态[25,0,0]或[5,0,0]会被识别为STANDING，但我们需要等待稳定
+            if exec_t == (20, 0, 0):  # 打招呼动作
+                logging.info("等待'打招呼'动作稳定到站立状态[6,0,0]...")
+                # 等待状态稳定到[6,0,0]，最多等待8秒
+                if self._status.wait_until(lambda s: s[0] == 6 and s[2] == 0, timeout=8.0):
+                    logging.info("动作已稳定到站立状态: %s", self._status.get_latest())
+                    return True
+                # 如果超时，但当前状态仍识别为STANDING（过渡状态），也认为完成
+                if self._classify_state(self._status.get_latest()) == DogState.STANDING:
+                    logging.info("动作已进入站立过渡状态，继续执行")
+                    return True
+            # 第二阶段：其他动作在状态离开执行状态后，等待稳定
+            elif self._wait_motion_stable(timeout=5.0):
+                logging.info("动作执行完成，状态已稳定")
+                return True
+
         # 如果超时，尝试等待稳定
-        logging.warning(f"等待动作完成超时，尝试等待状态稳定...")
+        logging.warning("等待动作完成超时，尝试等待状态稳定...")
         self._wait_motion_stable(timeout=3.0)
         return False
 
@@ -325,6 +369,8 @@ class DogCommandExecutor:
         
         如果当前状态已经是目标状态（包括过渡状态），等待稳定即可，不需要切换。
         """
+        if self._already_in(target):
+            return
         self._refresh_state(timeout=1.0)
         if self._cur_state == target: 
             # 如果当前状态已经是目标状态，检查是否需要等待稳定
@@ -332,15 +378,11 @@ class DogCommandExecutor:
             if latest and len(latest) >= 3:
                 # 如果状态是过渡状态（如25或5），等待稳定到最终状态（如6）
                 if latest[0] in [25, 5] and target == DogState.STANDING:
-                    logging.info(f"当前处于站立过渡状态 {latest}，等待稳定到[6,0,0]...")
-                    stable_deadline = time.time() + 5.0
-                    while time.time() < stable_deadline:
-                        st_check = self._status.get_latest()
-                        if st_check and len(st_check) >= 3 and st_check[0] == 6 and st_check[2] == 0:
-                            logging.info(f"已稳定到站立状态: {st_check}")
-                            self._cur_state = DogState.STANDING
-                            return
-                        time.sleep(0.1)
+                    logging.info("当前处于站立过渡状态 %s，等待稳定到[6,0,0]...", latest)
+                    if self._status.wait_until(lambda s: len(s) >= 3 and s[0] == 6 and s[2] == 0, timeout=5.0):
+                        logging.info("已稳定到站立状态: %s", self._status.get_latest())
+                        self._cur_state = DogState.STANDING
+                        return
                     # 如果超时，但状态已经是STANDING，也认为成功
                     logging.info("过渡状态等待超时，但状态已识别为STANDING，继续执行")
                 else:
@@ -352,44 +394,50 @@ class DogCommandExecutor:
         if self._cur_state == DogState.UNKNOWN:
             logging.info("当前状态未知，尝试发送零指令恢复...")
             try:
-                self._perform_action(0x21010C05, 0)  # 零指令
-                time.sleep(1.5)
+                self._perform_action_fast(Action.ZERO, 0)  # 零指令
+                self._wait_status_change(timeout=1.5)
                 self._refresh_state(timeout=3.0)
                 # 如果仍然是UNKNOWN，根据目标状态尝试切换
                 if self._cur_state == DogState.UNKNOWN:
-                    logging.warning(f"零指令后仍为UNKNOWN，直接尝试切换到目标状态: {target}")
-                    self._perform_action(0x21010202, 0)  # 站立/趴下切换
-                    time.sleep(1.0)
+                    logging.warning("零指令后仍为UNKNOWN，直接尝试切换到目标状态: %s", target)
+                    self._perform_action_fast(Action.STAND_DOWN, 0)  # 站立/趴下切换
+                    self._wait_status_change(timeout=1.0)
                     self._refresh_state(timeout=3.0)
             except Exception as e:
-                logging.warning(f"UNKNOWN状态恢复过程异常: {e}，继续尝试切换...")
+                logging.warning("UNKNOWN状态恢复过程异常: %s，继续尝试切换...", e)
         
         self._wait_motion_stable(timeout=4.0)
-        logging.info(f"当前: {self._cur_state}, 目标: {target}。尝试切换...")
+        logging.info("当前: %s, 目标: %s。尝试切换...", self._cur_state, target)
         for attempt in range(2):
             try:
-                self._perform_action(0x21010202, 0)  # 站立/趴下切换
+                self._perform_action_fast(Action.STAND_DOWN, 0)  # 站立/趴下切换
             except Exception as e:
-                logging.error(f"切换到目标状态 {target} 时发送指令异常: {e}")
+                logging.error("切换到目标状态 %s 时发送指令异常: %s", target, e)
                 break
 
-            time.sleep(0.5)  # 给状态切换一点时间
+            # 状态到达即被唤醒，不再预留固定的切换时间
             if self._wait_for_state(target, timeout=timeout):
-                logging.info(f"成功切换到: {self._cur_state}")
+                logging.info("成功切换到: %s", self._cur_state)
                 # 切换成功后，等待动作稳定
                 self._wait_motion_stable(timeout=3.0)
                 return
 
-            logging.warning(f"等待 {target} 超时 (第{attempt+1}次)，重试...")
+            logging.warning("等待 %s 超时 (第%s次)，重试...", target, attempt+1)
+            # 站立/趴下为切换指令，切换过程中重发会把状态切回去：仅在动作停止后重试（已稳定时立即返回）
             self._wait_motion_stable(timeout=2.0)
 
         # 到这里仍未成功，不再抛异常，避免整个任务进程崩溃，只记录错误并继续后续动作
-        logging.error(f"无法可靠进入目标状态: {target}，后续动作将在当前状态 {self._cur_state} 下继续执行")
+        logging.error("无法可靠进入目标状态: %s，后续动作将在当前状态 %s 下继续执行", target, self._cur_state)
 
     def _run_repeat_action(self, code: int, seconds: float, val: int) -> None:
-        th = MyRepeatThread(f"ACTION_{hex(code)}", self._perform_action, 0.1, seconds, code, val, 0)
-        th.start()
-        th.join()
+        """在调用线程内以 100ms 周期重复发送指令 seconds 秒（调用方本就阻塞等待，无需借助调度线程）"""
+        log = _TaskLog(logging.getLogger(), {"task": f"ACTION_{hex(code)}"})
+        try:
+            paced_send(self._send_cached, seconds, 0.1, code, val)
+        except OSError:
+            log.warning("执行时发生OSError (socket可能已关闭), 任务停止。")
+            return
+        log.info(f"由于超过时间阈值{seconds}秒，系统自动停止！")
     
     def _run_repeat_action_with_obstacle_check(self, code: int, seconds: float, val: int, semantic: str, param: float) -> None:
         """执行重复动作，并在执行过程中检测障碍物、楼梯、坑洞"""
@@ -401,9 +449,8 @@ class DogCommandExecutor:
         # 重置避障计数器（新的动作序列）
         self._obstacle_manager.reset_counters()
         
-        # 创建动作线程
-        th = MyRepeatThread(f"ACTION_{hex(code)}", self._perform_action, 0.1, seconds, code, val, 0)
-        th.start()
+        # 创建动作任务（接口与 MyRepeatThread 一致，可直接交给避障管理器停止/查询）
+        th = self._scheduler.schedule_periodic(f"ACTION_{hex(code)}", self._send_cached, 0.1, seconds, code, val)
         
         # 在执行过程中实时检测障碍物
         check_interval = 0.1  # 100ms检测一次
@@ -462,10 +509,10 @@ class DogCommandExecutor:
     def _prepare_for_first_move(self) -> None:
         """准备移动动作：确保站立状态并切换到移动模式"""
         logging.info("准备移动动作：切换到手动模式并确保站立...")
-        self._perform_action(0x21010C02, 0)  # 手动模式
+        self._perform_action_fast(Action.MANUAL_MODE, 0)  # 手动模式
         time.sleep(0.3)
         self._ensure_state(DogState.STANDING, timeout=10.0)
-        self._perform_action(0x21010D06, 0)  # 移动模式
+        self._perform_action_fast(Action.MOBILE_MODE, 0)  # 移动模式
         time.sleep(0.5)  # 给模式切换足够时间
         self._wait_motion_stable(timeout=3.0)
 
@@ -482,40 +529,28 @@ class DogCommandExecutor:
         logging.info("执行太空步 0x2101030C（完全按 gesture_main 风格）...")
 
         try:
-            # 1. 仅当当前是站立 [6,0,0] 时才执行太空步，否则直接跳过
-            try:
-                cur = status_listener()
-            except Exception as e:
-                logging.error(f"太空步前读取状态失败，放弃执行本次太空步: {e}")
-                return
+            # 1. 仅当当前是站立 [6,0,0] 时才执行太空步，否则直接跳过（读状态影子，不与监听线程争抢 socket）
+            cur = self._status.get_latest()
 
-            if not (isinstance(cur, (list, tuple)) and len(cur) >= 3 and cur[0] == 6 and cur[1] == 0 and cur[2] == 0):
+            if cur != (6, 0, 0):
                 logging.warning(f"当前状态不是站立[6,0,0]({cur})，不执行太空步，直接继续后续动作")
                 return
 
             # 2. 发送太空步指令（等价于 gesture_main 里的 ACTION_MOONWALK）
-            self._perform_action(0x2101030C, 0)
+            self._perform_action_fast(Action.MOONWALK, 0)
 
             # 3. 等待进入执行状态 [6,12,1]，超时则放弃，不做收尾
             logging.info("已发送太空步指令，等待状态变为[6,12,1]...")
-            start = time.time()
-            entered = False
-            while time.time() - start < 8.0:
-                st = status_listener()
-                if isinstance(st, (list, tuple)) and len(st) >= 3 and st[0] == 6 and st[1] == 12 and st[2] == 1:
-                    logging.info("检测到太空步执行状态 [6,12,1]，开始计时 4 秒（参考 gesture_main）...")
-                    entered = True
-                    break
-                time.sleep(0.05)
-
-            if not entered:
+            if self._status.wait_until(lambda s: s == (6, 12, 1), timeout=8.0):
+                logging.info("检测到太空步执行状态 [6,12,1]，开始计时 4 秒（参考 gesture_main）...")
+            else:
                 logging.warning("在 8 秒内没有检测到太空步执行状态 [6,12,1]，放弃收尾，继续后续动作")
                 return
 
             # 4. 进入执行状态后 sleep(4)，然后发送 0x21010202 收尾（与 gesture_main 一致）
             time.sleep(4.0)
             logging.info("太空步计时 4 秒结束，发送收尾动作 0x21010202（与 gesture_main 一致）...")
-            self._perform_action(0x21010202, 0)
+            self._perform_action_fast(Action.STAND_DOWN, 0)
 
             # 5. 不做强制姿态修正，只简单记一次状态，交给后续动作自己处理
             self._refresh_state(timeout=1.0)
@@ -526,102 +561,106 @@ class DogCommandExecutor:
             logging.error(f"太空步执行过程中出现未捕获异常，将跳过本动作继续后续动作: {e}")
 
     def _exec_motion(self, code: int, param: float, semantic: Optional[str]) -> None:
-        """执行单个动作，参考gesture_main和precise_control_main的设计"""
+        """执行单个动作，参考gesture_main和precise_control_main的设计
 
-        # 太空步单独走一条“仿 gesture_main”的专用流程，避免在通用逻辑里引入过多分支导致不稳定
-        if code == 0x2101030C:
-            self._exec_moonwalk()
-            return
+        通过融合后的 ACTION_SPEC / SEMANTIC_SPEC 一次查表得到前置状态与处理函数。
+        """
+        spec = SEMANTIC_SPEC.get(semantic)
+        if spec is None or spec.code != code:
+            spec = ACTION_SPEC.get(code, _OTHER_SPEC)
 
-        need_state = PREREQUISITE_STATE.get(code)
-        if need_state: 
-            self._ensure_state(need_state)
+        if spec.prereq:
+            self._ensure_state(spec.prereq)
+        spec.handler(self, code, param, semantic, spec)
 
+    def _exec_moonwalk_action(self, code: int, param: float, semantic: Optional[str], spec: "ActionSpec") -> None:
+        # 太空步单独走一条“仿 gesture_main”的专用流程，避免在通用逻辑里引入过多分支导致不稳定
+        self._exec_moonwalk()
+
+    def _exec_move(self, code: int, param: float, semantic: Optional[str], spec: "ActionSpec") -> None:
         # 移动动作：参考precise_control_main的设计，每个动作后都有停顿
-        if semantic in MOVE_CODE and MOVE_CODE[semantic] == code:
-            # 确保在移动模式
-            self._perform_action(0x21010D06, 0)
-            time.sleep(0.2)
-            
-            if semantic == "move_x": 
-                times, val = go_straight(param, 3)
-            elif semantic == "move_y": 
-                times, val = translate_left_and_right(param, 3)
-            elif semantic == "move_yaw": 
-                times, val = revolve_left_and_right(param)
-            else: 
-                raise ValueError("未知移动语义")
-            
-            # 执行移动动作（带避障检测）
-            self._run_repeat_action_with_obstacle_check(code, times, val, semantic, param)
-            # 完全停止（参考precise_control_main的1秒停顿）
-            self._send_stop_motion()
-            return
+        # 确保在移动模式（移动模式指令与首个移动帧之间只保留最低发送间隔）
+        self._perform_action_fast(Action.MOBILE_MODE, 0)
+        time.sleep(_MIN_CMD_GAP)
 
-        # 姿态调整：必须在原地模式，且确保站立状态（抬头低头不能在趴下时执行）
-        if semantic in POSTURE_CODE and POSTURE_CODE[semantic] == code:
-            # 抬头低头需要站立状态
-            if semantic == "posture_pitch":
-                if self._cur_state != DogState.STANDING:
-                    logging.warning(f"抬头低头需要站立状态，当前: {self._cur_state}，先切换到站立...")
-                    self._ensure_state(DogState.STANDING, timeout=8.0)
-            
-            self._perform_action(0x21010D05, 0)  # 原地模式
-            time.sleep(0.3)
-            self._perform_action(code, int(param))
-            time.sleep(0.8)  # 给姿态调整足够时间
-            return
+        times, val = spec.speed(param)
 
+        # 执行移动动作（带避障检测）
+        self._run_repeat_action_with_obstacle_check(code, times, val, semantic, param)
+        # 完全停止（参考precise_control_main的1秒停顿）
+        self._send_stop_motion()
+
+    def _exec_posture(self, code: int, param: float, semantic: Optional[str], spec: "ActionSpec") -> None:
+        # 姿态调整：必须在原地模式，且确保站立状态（抬头低头不能在趴下时执行）
+        # 抬头低头需要站立状态
+        if semantic == "posture_pitch":
+            if self._cur_state != DogState.STANDING:
+                logging.warning(f"抬头低头需要站立状态，当前: {self._cur_state}，先切换到站立...")
+                self._ensure_state(DogState.STANDING, timeout=8.0)
+
+        self._perform_action_fast(Action.IN_PLACE_MODE, 0)  # 原地模式
+        # 以状态确认代替固定等待：站立/打招呼状态下即可发送姿态指令
+        self._settle(lambda s: s[0] in (6, 20), timeout=0.5)
+        self._perform_action_fast(code, int(param))
+        self._settle(lambda s: len(s) >= 3 and s[2] == 0, timeout=1.0)  # 给姿态调整足够时间
+
+    def _exec_stunt(self, code: int, param: float, semantic: Optional[str], spec: "ActionSpec") -> None:
         # 特技动作：参考gesture_main.py的状态监听设计，但需要等待完成（连续动作）
-        if code in ACTION_EXECUTION_STATE:
-            execution_state = ACTION_EXECUTION_STATE[code]
-            logging.info(f"执行特技动作 {hex(code)}，等待进入执行状态: {execution_state}")
-            
-            # 发送动作命令
-            self._perform_action(code, 0)
-            
-            # 等待动作进入执行状态（参考gesture_main.py的while循环设计）
-            if not self._wait_for_execution_state(execution_state, timeout=8.0):
-                logging.warning(f"动作 {hex(code)} 未能在预期时间内进入执行状态，继续执行...")
-            
-            # 检查是否有特殊处理（如太空步需要sleep后发送站立命令）
-            if code in ACTION_SPECIAL_HANDLING:
-                handling = ACTION_SPECIAL_HANDLING[code]
-                wait_time = handling.get("wait_after_state", 0)
-                if wait_time > 0:
-                    logging.info(f"动作 {hex(code)} 执行状态确认后，额外等待 {wait_time} 秒...")
-                    time.sleep(wait_time)
-                
-                post_action = handling.get("post_action")
-                if post_action:
-                    logging.info(f"动作 {hex(code)} 执行完成，发送收尾动作: {hex(post_action)}")
-                    self._perform_action(post_action, 0)
-                    time.sleep(0.8)
-                    # 刷新状态并等待稳定
-                    self._refresh_state(timeout=2.0)
-                    self._wait_motion_stable(timeout=3.0)
-            
-            # 对于站立类特技（除了有特殊处理的），等待动作执行完成
-            elif PREREQUISITE_STATE.get(code) == DogState.STANDING:
-                logging.info(f"站立类特技 {hex(code)} 执行状态确认，等待动作完成...")
-                # 连续动作需要：等待状态离开执行状态并稳定
-                self._wait_for_action_completion(execution_state, timeout=15.0)
-                self._refresh_state(timeout=1.0)
-                # 确保站立状态稳定
-                self._wait_motion_stable(timeout=3.0)
-            
-            # 对于趴下类特技，执行状态就是完成状态[1,0,0]，等待稳定
-            elif PREREQUISITE_STATE.get(code) == DogState.LYING:
-                logging.info(f"趴下类特技 {hex(code)} 执行状态确认，等待稳定...")
-                # 状态已经是[1,0,0]，直接等待稳定
-                self._wait_motion_stable(timeout=6.0)
-                self._refresh_state(timeout=1.0)
-            
-            logging.info(f"特技动作 {hex(code)} 执行完成，当前状态: {self._cur_state}")
-            return
+        execution_state = spec.exec_state
+        logging.info("执行特技动作 %#x，等待进入执行状态: %s", code, execution_state)
 
+        # 发送动作命令
+        self._perform_action_fast(code, 0)
+
+        # 等待动作进入执行状态（参考gesture_main.py的while循环设计）
+        if not self._wait_for_execution_state(execution_state, timeout=8.0):
+            logging.warning("动作 %#x 未能在预期时间内进入执行状态，继续执行...", code)
+
+        # 检查是否有特殊处理（如太空步需要sleep后发送站立命令），否则按前置状态选择收尾方式
+        if spec.special is not None:
+            self._finish_special_stunt(code, spec)
+        else:
+            finish = _STUNT_FINISH.get(spec.prereq)
+            if finish is not None:
+                finish(self, code, spec)
+
+        logging.info("特技动作 %#x 执行完成，当前状态: %s", code, self._cur_state)
+
+    def _finish_special_stunt(self, code: int, spec: "ActionSpec") -> None:
+        handling = spec.special
+        wait_time = handling.get("wait_after_state", 0)
+        if wait_time > 0:
+            logging.info("动作 %#x 执行状态确认后，额外等待 %s 秒...", code, wait_time)
+            time.sleep(wait_time)
+
+        post_action = handling.get("post_action")
+        if post_action:
+            logging.info("动作 %#x 执行完成，发送收尾动作: %#x", code, post_action)
+            self._perform_action_fast(post_action, 0)
+            time.sleep(0.8)
+            # 刷新状态并等待稳定
+            self._refresh_state(timeout=2.0)
+            self._wait_motion_stable(timeout=3.0)
+
+    def _finish_standing_stunt(self, code: int, spec: "ActionSpec") -> None:
+        # 对于站立类特技（除了有特殊处理的），等待动作执行完成
+        logging.info("站立类特技 %#x 执行状态确认，等待动作完成...", code)
+        # 连续动作需要：等待状态离开执行状态并稳定
+        self._wait_for_action_completion(spec.exec_state, timeout=15.0)
+        self._refresh_state(timeout=1.0)
+        # 确保站立状态稳定
+        self._wait_motion_stable(timeout=3.0)
+
+    def _finish_lying_stunt(self, code: int, spec: "ActionSpec") -> None:
+        # 对于趴下类特技，执行状态就是完成状态[1,0,0]，等待稳定
+        logging.info("趴下类特技 %#x 执行状态确认，等待稳定...", code)
+        # 状态已经是[1,0,0]，直接等待稳定
+        self._wait_motion_stable(timeout=6.0)
+        self._refresh_state(timeout=1.0)
+
+    def _exec_other(self, code: int, param: float, semantic: Optional[str], spec: "ActionSpec") -> None:
         # 其他动作
-        self._perform_action(code, int(param))
+        self._perform_action_fast(code, int(param))
         time.sleep(0.5)
 
     def exec_actions(self, payload: Dict[str, Any]) -> List[ExecResult]:
@@ -640,7 +679,7 @@ class DogCommandExecutor:
             except Exception as e:
                 results.append(ExecResult(False, idx, 0, param, f"code解析失败: {e}", started, time.time())); break
 
-            if code == 0x21020C0E:
+            if code == Action.EMERGENCY_STOP:
                 try:
                     self.emergency_stop()
                     results.append(ExecResult(True, idx, code, param, "已急停", started, time.time()))
@@ -649,7 +688,7 @@ class DogCommandExecutor:
                 break
 
             try:
-                logging.info(f"==> [动作 {idx+1}/{len(actions)}] 开始: {hex(code)}")
+                logging.info(f"==> [动作 {idx+1}/{len(actions)}] 开始: {hex(code)} ({opcode_lookup(ACTION_NAME_TABLE, code, '未知动作')})")
                 self._exec_motion(code, float(param or 0), semantic)
                 results.append(ExecResult(True, idx, code, param, "执行成功", started, time.time()))
 
@@ -664,15 +703,13 @@ class DogCommandExecutor:
                         
                         # 如果下一个是移动动作，确保在移动模式
                         if next_semantic in MOVE_CODE:
-                            self._perform_action(0x21010D06, 0)
+                            self._perform_action_fast(Action.MOBILE_MODE, 0)
                             time.sleep(0.3)
                         # 如果下一个是特技动作，准备状态
                         elif next_code in PREREQUISITE_STATE:
                             target_state = PREREQUISITE_STATE[next_code]
-                            # 先刷新状态，避免基于错误状态做判断
-                            self._refresh_state(timeout=1.0)
-                            self._wait_motion_stable(timeout=3.0)  # 缩短超时时间，避免阻塞
-                            logging.info(f"为下一个动作 {hex(next_code)} 准备，恢复到状态: {target_state}")
+                            # _ensure_state 内部先查状态影子（已就绪时立即返回），状态不符时才刷新并等待稳定
+                            logging.info("为下一个动作 %#x 准备，恢复到状态: %s", next_code, target_state)
                             self._ensure_state(target_state, timeout=10.0)
                         # 其他情况：简单等待稳定
                         else:
@@ -701,14 +738,84 @@ class DogCommandExecutor:
 
         return results
 
+class _TaskLog(logging.LoggerAdapter):
+    """在日志前加上任务名，与原重复发送线程的日志保持一致"""
+    def process(self, msg, kwargs):
+        return f"{self.extra['task']}{msg}", kwargs
+
+
+class ActionSpec(NamedTuple):
+    """单个动作的执行规格：把前置状态、执行状态、特殊处理与处理函数融合到一处（不可变、无 __dict__，兼容 3.8）"""
+    kind: str                                   # move / posture / stunt / moonwalk / other
+    handler: Any                                # DogCommandExecutor 上的未绑定处理函数
+    code: Optional[int] = None
+    prereq: Optional[str] = None                # 执行前需要达到的状态
+    exec_state: Optional[List[int]] = None      # 执行状态 [basic_state, gait_state, motion_state]
+    special: Optional[Dict[str, Any]] = None    # 特殊处理（额外等待/收尾动作）
+    speed: Any = None                           # 移动动作：param -> (持续时间, 速度值)
+
+
+def _build_action_spec() -> Dict[int, ActionSpec]:
+    specs: Dict[int, ActionSpec] = {}
+    for code in set(PREREQUISITE_STATE) | set(ACTION_EXECUTION_STATE):
+        specs[code] = ActionSpec(
+            kind="stunt" if code in ACTION_EXECUTION_STATE else "other",
+            handler=DogCommandExecutor._exec_stunt if code in ACTION_EXECUTION_STATE else DogCommandExecutor._exec_other,
+            code=code,
+            prereq=PREREQUISITE_STATE.get(code),
+            exec_state=ACTION_EXECUTION_STATE.get(code),
+            special=ACTION_SPECIAL_HANDLING.get(code),
+        )
+    # 太空步走专用流程，由流程内部自行检查站立状态
+    specs[Action.MOONWALK] = ActionSpec(kind="moonwalk", handler=DogCommandExecutor._exec_moonwalk_action, code=Action.MOONWALK)
+    return specs
+
+
+# 按动作码的融合分发表（特技/太空步）
+ACTION_SPEC: Dict[int, ActionSpec] = _build_action_spec()
+
+# 移动/姿态与原地/移动模式共用指令码，按语义区分
+SEMANTIC_SPEC: Dict[str, ActionSpec] = {
+    "move_x": ActionSpec(kind="move", handler=DogCommandExecutor._exec_move, code=MOVE_CODE["move_x"], speed=lambda p: go_straight(p, 3)),
+    "move_y": ActionSpec(kind="move", handler=DogCommandExecutor._exec_move, code=MOVE_CODE["move_y"], speed=lambda p: translate_left_and_right(p, 3)),
+    "move_yaw": ActionSpec(kind="move", handler=DogCommandExecutor._exec_move, code=MOVE_CODE["move_yaw"], speed=revolve_left_and_right),
+    **{
+        semantic: ActionSpec(kind="posture", handler=DogCommandExecutor._exec_posture, code=code)
+        for semantic, code in POSTURE_CODE.items()
+    },
+}
+
+_OTHER_SPEC = ActionSpec(kind="other", handler=DogCommandExecutor._exec_other)
+
+# 特技动作确认进入执行状态后，按前置状态选择收尾方式
+_STUNT_FINISH = {
+    DogState.STANDING: DogCommandExecutor._finish_standing_stunt,
+    DogState.LYING: DogCommandExecutor._finish_lying_stunt,
+}
+
 def _parse_args(argv: List[str]) -> argparse.Namespace:
+    # argparse/json 仅在命令行入口使用，延迟导入以缩短作为模块被导入（服务子进程）时的启动时间
+    import argparse
+
     p = argparse.ArgumentParser()
     p.add_argument("--dog-ip", default="192.168.1.120", help="UDP目标IP")
     p.add_argument("--dog-port", type=int, default=43893, help="UDP目标端口")
     p.add_argument("--json", required=True, help="动作序列JSON字符串")
     return p.parse_args(argv)
 
+def _dump_results(out: Dict[str, Any]) -> str:
+    """序列化执行结果：优先使用 orjson（C 实现，可直接序列化 dataclass），未安装时回退到标准库 json"""
+    try:
+        import orjson
+    except ImportError:
+        import json
+        out = dict(out, results=[r.__dict__ for r in out["results"]])
+        return json.dumps(out, ensure_ascii=False)
+    return orjson.dumps(out, option=orjson.OPT_SERIALIZE_DATACLASS).decode()
+
 def main(argv: Optional[List[str]] = None) -> int:
+    import json
+
     args = _parse_args(sys.argv[1:] if argv is None else argv)
     try: payload = json.loads(args.json)
     except Exception as e: print(json.dumps({"ok": False, "error": f"JSON解析失败: {e}"}, ensure_ascii=False)); return 2
@@ -716,8 +823,8 @@ def main(argv: Optional[List[str]] = None) -> int:
     exec_ = DogCommandExecutor(args.dog_ip, args.dog_port)
     try:
         results = exec_.exec_actions(payload)
-        out = {"ok": all(r.ok for r in results), "results": [r.__dict__ for r in results]}
-        print(json.dumps(out, ensure_ascii=False))
+        out = {"ok": all(r.ok for r in results), "results": results}
+        print(_dump_results(out))
         return 0 if out["ok"] else 1
     finally:
         exec_.close()
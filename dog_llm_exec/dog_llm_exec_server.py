@@ -6,150 +6,355 @@
 特性：
 - 监听 0.0.0.0
 - POST /execute : 提交动作序列JSON，返回 task_id
-- GET  /result?task_id=... : 查询执行结果/状态
+- GET  /result?task_id=...[&wait=秒] : 查询执行结果/状态；带 wait 时任务结束前会挂起等待（长轮询）
+- GET  /logs?since=N[&wait=秒] : 获取日志；带 wait 时没有新日志会挂起等待（长轮询）
 - POST /emergency_stop : 立即急停（抢占），并取消队列中未开始的任务
 - GET  /health : 健康检查
 
 关键增强：
 - 执行动作任务在子进程中运行：即使子进程崩溃/退出，HTTP服务主进程也保持可用，不会出现 Connection refused
+- HTTP 服务运行在单个 asyncio 事件循环上，前端高频轮询 /logs 时不再为每个连接创建线程
 
 实现约束：
-- 不依赖任何第三方库（无互联网也能用）
+- 不依赖任何第三方库（无互联网也能用）；若已安装 orjson 会自动用于 JSON 编解码
 
 注意：
-- 子进程会单独创建UDP socket/状态监听端口，因此同一时间只允许一个任务 running。
+- 动作在一个常驻子进程中依次执行（子进程持有UDP socket/状态监听端口），因此同一时间只允许一个任务 running。
 """
 
+import asyncio
+import collections
+import ctypes
 import io
+import itertools
 import json
 import logging
 import multiprocessing as mp
+import multiprocessing.connection
 import queue
+import secrets
+import signal
+import socket
+import struct
 import sys
 import threading
 import time
-import uuid
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# 可选加速：装了 orjson 就用它做 JSON 编解码（C 实现，直接输出 UTF-8 bytes），否则回退到标准库
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    # 编码器在模块加载时创建一次，每次调用不再新建；紧凑分隔符与 orjson 输出一致
+    _encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def _dumps(obj: Any) -> bytes:
+        return _encode(obj).encode("utf-8")
+    _loads = json.loads
 
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(message)s")
 
+class _LoopNotifier:
+    """在事件循环上挂起长轮询请求；其他线程的状态变化通过 call_soon_threadsafe 唤醒它们（不占用线程池线程）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: "set[asyncio.Future]" = set()  # 只在事件循环线程中访问
+        self._scheduled = False
+
+    def notify(self) -> None:
+        """可在任意线程调用；唤醒回调执行前的多次通知合并为一次"""
+        loop = self._loop
+        if loop is None:
+            return
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:  # 事件循环已关闭
+            with self._lock:
+                self._scheduled = False
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._scheduled = False
+        waiters, self._waiters = self._waiters, set()
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(None)
+
+    async def wait_until(self, ready: Callable[[], bool], timeout: float) -> None:
+        """挂起直到 ready() 为真或超时；检查与登记之间没有 await，不会漏掉唤醒"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 首次等待（或事件循环被重建）时绑定当前循环，旧循环上未执行的唤醒作废
+            with self._lock:
+                self._loop = loop
+                self._scheduled = False
+        deadline = loop.time() + timeout
+        while not ready():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            fut = loop.create_future()
+            self._waiters.add(fut)
+            try:
+                await asyncio.wait_for(fut, remaining)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                self._waiters.discard(fut)
+
+
 # 日志收集器：收集所有日志输出
 class LogCollector:
     def __init__(self):
         self._lock = threading.Lock()
-        self._logs: list = []
+        # 有新日志时唤醒长轮询的 /logs 请求
+        self._notifier = _LoopNotifier()
         self._max_logs = 1000  # 最多保存1000条日志
+        # 超出上限时 deque 自动 O(1) 丢弃最旧的一条
+        self._logs: "collections.deque[str]" = collections.deque(maxlen=self._max_logs)
+        self._dropped = 0  # 已被丢弃的日志条数，使 since 始终是从服务启动起的绝对索引
         
     def append(self, log_entry: str):
         with self._lock:
+            if len(self._logs) == self._max_logs:
+                self._dropped += 1
             self._logs.append(log_entry)
-            # 保持日志数量在限制内
-            if len(self._logs) > self._max_logs:
-                self._logs = self._logs[-self._max_logs:]
+        self._notifier.notify()
+
+    def extend(self, log_entries: list):
+        """批量追加：一次加锁、一次唤醒"""
+        if not log_entries:
+            return
+        with self._lock:
+            self._dropped += max(0, len(self._logs) + len(log_entries) - self._max_logs)
+            self._logs.extend(log_entries)
+        self._notifier.notify()
     
     def get_logs(self, since: int = 0) -> list:
-        """获取日志，since 是起始索引"""
+        """获取日志，since 是起始索引（绝对索引，不受旧日志丢弃影响）"""
         with self._lock:
-            return self._logs[since:]
+            return list(itertools.islice(self._logs, max(0, since - self._dropped), None))
     
+    async def wait_logs(self, since: int, timeout: float) -> list:
+        """长轮询：没有 since 之后的新日志时最多等待 timeout 秒（须在事件循环中调用）"""
+        await self._notifier.wait_until(lambda: self._dropped + len(self._logs) > since, timeout)
+        return self.get_logs(since)
+
     def clear(self):
         with self._lock:
+            self._dropped += len(self._logs)
             self._logs.clear()
 
 # 全局日志收集器
 _log_collector = LogCollector()
 
-# 用于子进程传递日志的队列
-_log_queue: Optional[mp.Queue] = None
+class LogRing:
+    """子进程 -> 主进程的共享内存环形日志缓冲区（单生产者/单消费者）。
+
+    每条记录为一行 UTF-8 文本，首字节标记类型：L = 已格式化的 logging 记录，P = print 输出（由主进程补时间戳）。
+    环形缓冲区会丢弃数据，任务结果不经过这里，而是走可靠的结果管道。
+    子进程只追加并推进 write_idx，不等待也不做序列化；主进程按自己的读位置一次性读出 [read, write) 区间。
+    写入方拷贝数据前先发布 reserve_idx，读取方据此丢弃拷贝期间可能被覆盖的部分。
+    写入方超过读取方一整圈时丢弃最旧的数据，内存占用固定。
+    """
+
+    def __init__(self, size: int = 1 << 20) -> None:
+        self.size = size
+        self._buf = mp.RawArray(ctypes.c_ubyte, size)
+        self._write_idx = mp.RawValue(ctypes.c_uint64, 0)
+        # 写入方即将写到的位置：拷贝数据前先推进，[write_idx, reserve_idx) 为正在写入的区间
+        self._reserve_idx = mp.RawValue(ctypes.c_uint64, 0)
+        self._read = 0          # 读位置只在主进程中使用
+        self._pending = b""     # 主进程中尚未遇到换行的残余数据
+        self._lock: Optional[threading.Lock] = None
+
+    def __getstate__(self):
+        return {"size": self.size, "_buf": self._buf, "_write_idx": self._write_idx,
+                "_reserve_idx": self._reserve_idx}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._read = 0
+        self._pending = b""
+        self._lock = None
+
+    # ---- 子进程（写入方） ----
+    def write(self, kind: str, text: str) -> None:
+        data = (kind + text.replace("\n", "\n" + kind) + "\n").encode("utf-8", errors="replace")
+        if self._lock is None:
+            self._lock = threading.Lock()
+        # 子进程内多个线程都会写日志，写入方内部串行化
+        with self._lock:
+            size = self.size
+            if len(data) > size:
+                data = data[-size:]
+            n = len(data)
+            w = self._write_idx.value
+            # 先发布预留位置，再覆盖缓冲区
+            self._reserve_idx.value = w + n
+            pos = w % size
+            first = min(n, size - pos)
+            base = ctypes.addressof(self._buf)
+            ctypes.memmove(base + pos, data, first)
+            if first < n:
+                ctypes.memmove(base, data[first:], n - first)
+            # 数据拷贝完成后再发布新的写位置
+            self._write_idx.value = w + n
+
+    # ---- 主进程（读取方） ----
+    def _copy(self, start: int, end: int) -> bytes:
+        size = self.size
+        pos = start % size
+        n = end - start
+        first = min(n, size - pos)
+        base = ctypes.addressof(self._buf)
+        data = ctypes.string_at(base + pos, first)
+        if first < n:
+            data += ctypes.string_at(base, n - first)
+        return data
+
+    def read_lines(self) -> list:
+        w = self._write_idx.value
+        r = self._read
+        if w == r:
+            return []
+        dropped = w - r > self.size
+        if dropped:
+            r = w - self.size
+        data = self._copy(r, w)
+        # 拷贝期间写入方可能正在覆盖区间开头（数据写完之前 write_idx 还没推进），
+        # 按预留位置判断，reserve - size 之前的部分都可能已被覆盖，一律丢弃
+        lapped = self._reserve_idx.value - self.size
+        if lapped > r:
+            data = data[lapped - r:]
+            dropped = True
+        self._read = w
+
+        if dropped:
+            # 丢弃了最旧的数据，残余行和被截断的首行都已不完整
+            self._pending = b""
+            data = data[data.find(b"\n") + 1:]
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        return [line.decode("utf-8", errors="replace") for line in lines if line]
+
+
+# 子进程中指向日志环形缓冲区（主进程中为 None）
+_log_ring: Optional[LogRing] = None
 
 # 自定义日志处理器，将日志输出到收集器
 class LogCollectorHandler(logging.Handler):
     def emit(self, record):
         log_entry = self.format(record)
-        # 不过滤，所有日志都收集
-        _log_collector.append(log_entry)
-        # 如果是子进程，也发送到队列
-        if _log_queue is not None:
+        # 子进程：只写入环形缓冲区，日志收集器归主进程所有
+        if _log_ring is not None:
             try:
-                _log_queue.put_nowait(("log", log_entry))
+                _log_ring.write("L", log_entry)
             except:
                 pass
+            return
+        # 不过滤，所有日志都收集
+        _log_collector.append(log_entry)
+
+# 同一秒内的日志共用一次 strftime 的结果：[秒, 格式化后的时间字符串]
+_ts_cache = [-1, ""]
+
+def _timestamp(t: Optional[float] = None) -> str:
+    """按秒缓存的 "%Y-%m-%d %H:%M:%S" 时间戳"""
+    sec = int(time.time() if t is None else t)
+    if sec != _ts_cache[0]:
+        _ts_cache[1] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        _ts_cache[0] = sec
+    return _ts_cache[1]
 
-# 添加日志收集器到根 logger
+class CachedTimeFormatter(logging.Formatter):
+    """与 logging.Formatter 输出一致，但 asctime 按秒缓存，不再每条日志调用一次 strftime"""
+    def formatTime(self, record, datefmt=None):
+        return _timestamp(record.created)
+
+_LOG_FORMAT = "[%(asctime)s] %(levelname)s %(message)s"
+
+# 添加日志收集器到根 logger（仅主进程；子进程导入本模块时不安装，由 _worker_main 设置自己的 handler）
 _log_handler = LogCollectorHandler()
-_log_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
-logging.getLogger().addHandler(_log_handler)
+_log_handler.setFormatter(CachedTimeFormatter(_LOG_FORMAT))
+if mp.current_process().name == "MainProcess":
+    logging.getLogger().addHandler(_log_handler)
 
 # 用于捕获 print() 和 stderr 的流包装器
 class LogStream(io.TextIOBase):
     """将 stdout/stderr 输出转换为日志的流包装器"""
-    def __init__(self, name: str, original_stream, log_queue: Optional["mp.Queue"] = None):
+    def __init__(self, name: str, original_stream, log_ring: Optional[LogRing] = None):
         self.name = name
         self.original_stream = original_stream
-        self.log_queue = log_queue
-        self.buffer = []  # 用于缓冲不完整的行
+        self.log_ring = log_ring
+        self._tail = ""  # 尚未遇到换行符的不完整行
         
     def write(self, text: str) -> int:
         # 捕获所有输出（包括空行和多行输出）
         if text:
-            # 将新文本添加到缓冲区
-            self.buffer.append(text)
-            
-            # 检查是否有完整的行（以换行符结尾）
-            buffered_text = ''.join(self.buffer)
-            if '\n' in buffered_text:
-                # 按行分割
-                lines = buffered_text.split('\n')
-                # 最后一部分（可能不完整）保留在缓冲区
-                self.buffer = [lines[-1]] if lines[-1] else []
-                
-                # 处理完整的行
-                for line in lines[:-1]:
-                    line = line.rstrip('\r')
-                    # 发送每一行到日志队列（添加时间戳，与logging格式一致）
-                    if self.log_queue is not None:
-                        try:
-                            import datetime
-                            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            # 如果行不为空，添加时间戳；空行也保留（某些库用空行作为分隔）
-                            formatted_line = f"[{timestamp}] INFO {line}" if line else ""
-                            if formatted_line:
-                                self.log_queue.put_nowait(("print", formatted_line))
-                        except:
-                            pass
-        
-        return len(text)
-    
-    def flush(self):
-        # 刷新缓冲区中的内容
-        if self.buffer:
-            buffered_text = ''.join(self.buffer)
-            if buffered_text.strip():
-                if self.log_queue is not None:
+            data = self._tail + text
+            i = data.rfind('\n')
+            if i < 0:
+                # 还没有完整的行，整体留到下次
+                self._tail = data
+                return len(text)
+            # 最后一个换行符之后的部分（可能不完整）保留
+            self._tail = data[i + 1:]
+
+            # 处理完整的行
+            for line in data[:i].split('\n'):
+                line = line.rstrip('\r')
+                # 写入日志环形缓冲区（时间戳由主进程读取时补上，与logging格式一致）
+                if self.log_ring is not None and line:
                     try:
-                        import datetime
-                        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        formatted_line = f"[{timestamp}] INFO {buffered_text.rstrip()}"
-                        self.log_queue.put_nowait(("print", formatted_line))
+                        self.log_ring.write("P", line)
                     except:
                         pass
-            self.buffer = []
         
+        return len(text)
+    
+    def flush(self):
+        # 只刷新原始流；未换行的残余内容不在这里输出（库代码频繁调用 flush 时不会产生零碎的日志行）
         if self.original_stream:
             try:
                 self.original_stream.flush()
             except:
                 pass
 
+    def emit_pending(self):
+        """把未换行的残余内容作为一行写出（任务结束时调用）"""
+        if self._tail:
+            if self._tail.strip():
+                if self.log_ring is not None:
+                    try:
+                        self.log_ring.write("P", self._tail.rstrip())
+                    except:
+                        pass
+            self._tail = ""
+
+
+def _worker_main(task_queue: "mp.SimpleQueue", result_conn: "multiprocessing.connection.Connection", log_ring: LogRing, dog_ip: str, dog_port: int) -> None:
+    """常驻子进程入口：启动时完成导入与日志设置，之后循环从 task_queue 取任务执行。
+
+    日志写入环形缓冲区；任务结果序列化后经 result_conn 管道可靠上报（同时唤醒主进程），且总在本任务日志写完之后发送。
 
-def _worker_run(task_id: str, payload: Dict[str, Any], dog_ip: str, dog_port: int, result_queue: "mp.Queue", log_queue: "mp.Queue") -> None:
-    """子进程执行入口。"""
-    global _log_queue
-    _log_queue = log_queue
+    命令执行器在第一个任务到来时创建并一直复用（心跳、状态监听、避障线程持续运行），
+    后续任务不再需要重新启动解释器、导入模块和建立 socket。
+    """
+    global _log_ring
+    _log_ring = log_ring
     
-    # 在子进程中设置日志收集器，将日志发送到队列
+    # 在子进程中设置日志收集器，将日志写入环形缓冲区
     # 清除所有现有的 handler，避免日志重复输出
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
@@ -159,84 +364,107 @@ def _worker_run(task_id: str, payload: Dict[str, Any], dog_ip: str, dog_port: in
         def emit(self, record):
             log_entry = self.format(record)
             try:
-                log_queue.put_nowait(("log", log_entry))
+                log_ring.write("L", log_entry)
             except:
                 pass
     
     worker_handler = WorkerLogHandler()
-    worker_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    worker_handler.setFormatter(CachedTimeFormatter(_LOG_FORMAT))
     root_logger.addHandler(worker_handler)
     root_logger.setLevel(logging.INFO)  # 设置日志级别
     
     # 重定向 stdout 和 stderr 到日志流
     original_stdout = sys.stdout
     original_stderr = sys.stderr
-    sys.stdout = LogStream("stdout", original_stdout, log_queue)
-    sys.stderr = LogStream("stderr", original_stderr, log_queue)
+    log_streams = (LogStream("stdout", original_stdout, log_ring), LogStream("stderr", original_stderr, log_ring))
+    sys.stdout, sys.stderr = log_streams
     
+    # 直接导入命令执行器（不再做依赖库检查）；导入失败时每个任务都报告失败
     try:
-        # 直接导入命令执行器（不再做依赖库检查）
         from dog_llm_exec import DogCommandExecutor  # 子进程内导入
-
-        executor = DogCommandExecutor(dog_ip, dog_port)
-        try:
-            res = executor.exec_actions(payload)
-            out = {
-                "ok": all(r.ok for r in res) and len(res) == len(payload.get("actions", [])),
-                "results": [
-                    {
-                        "ok": r.ok,
-                        "index": r.action_index,
-                        "code": hex(r.code),
-                        "param": r.param,
-                        "message": r.message,
-                        "started_at": r.started_at,
-                        "finished_at": r.finished_at,
-                        "duration": round(r.finished_at - r.started_at, 3),
-                    }
-                    for r in res
-                ],
-            }
-            result_queue.put({"task_id": task_id, "status": "done", "result": out, "error": None})
-        finally:
+        import_error = None
+    except Exception as e:
+        DogCommandExecutor = None
+        import_error = e
+
+    executor = None
+    parent = mp.parent_process()
+    # 同时等待新任务和主进程退出：主进程被直接杀掉时不会发送退出信号，子进程自己发现后退出，避免一直占着 socket
+    handles = [task_queue._reader]  # type: ignore[attr-defined]
+    if parent is not None:
+        handles.append(parent.sentinel)
+    try:
+        while True:
+            ready = multiprocessing.connection.wait(handles)
+            if parent is not None and parent.sentinel in ready:
+                break
+            item = task_queue.get()
+            if item is None:
+                break
+            task_id, payload = item
             try:
-                executor.close()
+                if import_error is not None:
+                    raise import_error
+                if executor is None:
+                    executor = DogCommandExecutor(dog_ip, dog_port)
+                res = executor.exec_actions(payload)
+                out = {
+                    "ok": all(r.ok for r in res) and len(res) == len(payload.get("actions", [])),
+                    "results": [
+                        {
+                            "ok": r.ok,
+                            "index": r.action_index,
+                            "code": hex(r.code),
+                            "param": r.param,
+                            "message": r.message,
+                            "started_at": r.started_at,
+                            "finished_at": r.finished_at,
+                            "duration": round(r.finished_at - r.started_at, 3),
+                        }
+                        for r in res
+                    ],
+                }
+                msg = {"task_id": task_id, "status": "done", "result": out, "error": None}
+            except Exception as e:
+                # 子进程内异常（包括导入失败）
+                msg = {"task_id": task_id, "status": "failed", "result": None, "error": str(e)}
+
+            # 先把本任务的日志（包括未换行的残余输出）写进环形缓冲区，再上报结果：主进程收到结果时日志已经就位
+            for stream in log_streams:
+                stream.emit_pending()
+            try:
+                result_conn.send_bytes(_dumps(msg))
             except Exception:
                 pass
-    except Exception as e:
-        # 子进程内异常（包括导入失败）
-        try:
-            result_queue.put({"task_id": task_id, "status": "failed", "result": None, "error": str(e)})
-        except Exception:
-            pass
     finally:
-        # 确保所有日志都被发送（刷新缓冲区）
-        try:
-            if hasattr(sys.stdout, 'flush'):
-                sys.stdout.flush()
-            if hasattr(sys.stderr, 'flush'):
-                sys.stderr.flush()
-        except:
-            pass
-        
-        # 恢复原始 stdout/stderr
+        if executor is not None:
+            try:
+                executor.close()
+            except Exception:
+                pass
+        # 恢复原始 stdout/stderr（先写出残余内容）
+        for stream in log_streams:
+            stream.emit_pending()
         sys.stdout = original_stdout
         sys.stderr = original_stderr
-        
-        # 发送一个结束标记，确保主进程知道子进程已退出
-        try:
-            log_queue.put(("done", ""))
-        except:
-            pass
 
 
 class TaskStore:
-    def __init__(self) -> None:
+    # 已结束的任务，超出上限时可以按最久未更新的顺序淘汰
+    _FINISHED = frozenset(("done", "failed", "cancelled"))
+
+    def __init__(self, max_tasks: int = 10_000) -> None:
         self._lock = threading.Lock()
-        self._tasks: Dict[str, Dict[str, Any]] = {}
+        # 任务状态变化时唤醒长轮询的 /result 请求
+        self._notifier = _LoopNotifier()
+        # 按最近更新顺序排列，最旧的在前
+        self._tasks: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self._max_tasks = max_tasks
+        # /result 响应体缓存：第一次查询时序列化，任务有任何更新时作废
+        self._json_cache: Dict[str, bytes] = {}
 
     def create(self, payload: Dict[str, Any]) -> str:
-        task_id = uuid.uuid4().hex
+        task_id = secrets.token_hex(16)
         now = time.time()
         with self._lock:
             self._tasks[task_id] = {
@@ -250,20 +478,74 @@ class TaskStore:
                 "finished_at": None,
                 "worker_exitcode": None,
             }
+            self._evict_locked()
+        self._notifier.notify()
         return task_id
 
+    def _evict_locked(self) -> None:
+        """任务数超过上限时淘汰最旧的已结束任务（排队中/运行中的任务不淘汰）"""
+        excess = len(self._tasks) - self._max_tasks
+        if excess <= 0:
+            return
+        victims = []
+        for task_id, t in self._tasks.items():
+            if t["status"] in self._FINISHED:
+                victims.append(task_id)
+                if len(victims) == excess:
+                    break
+        for task_id in victims:
+            del self._tasks[task_id]
+            self._json_cache.pop(task_id, None)
+
     def update(self, task_id: str, **kwargs: Any) -> None:
         with self._lock:
             t = self._tasks.get(task_id)
             if not t:
                 return
             t.update(kwargs)
+            self._tasks.move_to_end(task_id)
+            self._json_cache.pop(task_id, None)
+        self._notifier.notify()
+
+    def update_many(self, updates: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """一次加锁批量更新多个任务"""
+        with self._lock:
+            for task_id, fields in updates:
+                t = self._tasks.get(task_id)
+                if not t:
+                    continue
+                t.update(fields)
+                self._tasks.move_to_end(task_id)
+                self._json_cache.pop(task_id, None)
+        self._notifier.notify()
 
     def get(self, task_id: str) -> Optional[Dict[str, Any]]:
         with self._lock:
             t = self._tasks.get(task_id)
             return dict(t) if t else None
 
+    def _json_locked(self, task_id: str) -> Optional[bytes]:
+        body = self._json_cache.get(task_id)
+        if body is None:
+            t = self._tasks.get(task_id)
+            if not t:
+                return None
+            body = self._json_cache[task_id] = _dumps({"ok": True, "task": t})
+        return body
+
+    def get_json(self, task_id: str) -> Optional[bytes]:
+        """返回 /result 的响应体（已序列化），任务不存在时返回 None"""
+        with self._lock:
+            return self._json_locked(task_id)
+
+    async def wait_finished(self, task_id: str, timeout: float) -> Optional[bytes]:
+        """长轮询：任务未结束时最多等待 timeout 秒，返回此时 /result 的响应体（须在事件循环中调用）"""
+        await self._notifier.wait_until(
+            lambda: self._tasks.get(task_id, {"status": "done"})["status"] in self._FINISHED,
+            timeout,
+        )
+        return self.get_json(task_id)
+
     def cancel_all_queued(self, reason: str) -> None:
         now = time.time()
         with self._lock:
@@ -272,6 +554,8 @@ class TaskStore:
                     t["status"] = "cancelled"
                     t["error"] = reason
                     t["finished_at"] = now
+                    self._json_cache.pop(t["task_id"], None)
+        self._notifier.notify()
 
 
 class CommandService:
@@ -283,10 +567,30 @@ class CommandService:
         self._queue: "queue.Queue[str]" = queue.Queue()
         self._stop_event = threading.Event()
 
+        # 常驻执行子进程及其任务队列（子进程被急停终止后由调度线程立即重新启动）
         self._current_proc: Optional[mp.Process] = None
+        # 任务队列用 SimpleQueue：put 直接写管道，子进程里没有额外的 feeder 线程
+        self._task_queue: Optional["mp.SimpleQueue"] = None
+        # 结果管道的读端：子进程把任务结果写入管道，同时唤醒调度线程。
+        # 主进程不保留写端，子进程退出后读端读到 EOF 即关闭，不会一直可读
+        self._result_conn: Optional["multiprocessing.connection.Connection"] = None
         self._current_task_id: Optional[str] = None
-        self._current_log_queue: Optional["mp.Queue"] = None
-        self._result_queue: "mp.Queue" = mp.Queue()
+        # 所有任务共用一个日志环形缓冲区（同一时间只有一个子进程在写）
+        self._log_ring = LogRing()
+
+        # 主进程急停用的 UDP socket 与报文预先准备好，急停时只需一次 sendto
+        self._estop_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._estop_sock.setblocking(False)
+        self._estop_pkt = struct.pack('<3i', 0x21020C0E, 0, 0)
+        self._estop_addr = (dog_ip, dog_port)
+
+        # 调度线程的唤醒通道：提交任务时写一个字节，调度线程无需轮询任务队列
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+        # 服务启动时即预热执行子进程，第一个任务不再等待解释器启动和模块导入
+        self._ensure_worker()
 
         self._worker = threading.Thread(target=self._loop, daemon=True)
         self._worker.start()
@@ -294,11 +598,18 @@ class CommandService:
     def submit(self, payload: Dict[str, Any]) -> str:
         task_id = self._tasks.create(payload)
         self._queue.put(task_id)
+        self._wake()
         return task_id
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         return self._tasks.get(task_id)
 
+    def get_task_json(self, task_id: str) -> Optional[bytes]:
+        return self._tasks.get_json(task_id)
+
+    async def wait_task(self, task_id: str, timeout: float) -> Optional[bytes]:
+        return await self._tasks.wait_finished(task_id, timeout)
+
     def emergency_stop(self) -> None:
         # 取消队列
         self._tasks.cancel_all_queued("被急停取消")
@@ -308,71 +619,118 @@ class CommandService:
         except queue.Empty:
             pass
 
-        # 终止当前子进程
+        # 先终止当前子进程（动作执行没有可中断点，直接终止最可靠；调度线程回收后会立即启动新的子进程）。
+        # 短暂等待其退出，避免子进程在急停报文之后又发出一条运动指令
         if self._current_proc is not None and self._current_proc.is_alive():
             self._current_proc.terminate()
+            self._current_proc.join(0.1)
 
-        # 尝试直接对运动主机发送急停（主进程内快速执行）
+        # 再直接对运动主机发送急停（报文与 socket 已预先准备好，只需一次 sendto）
         try:
-            import socket
-            import struct
-
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.sendto(struct.pack('<3i', 0x21020C0E, 0, 0), (self._dog_ip, self._dog_port))
-            s.close()
+            self._estop_sock.sendto(self._estop_pkt, self._estop_addr)
         except Exception:
             pass
 
-    def _drain_worker_results(self) -> None:
-        while True:
-            try:
-                msg = self._result_queue.get_nowait()
-            except Exception:
-                return
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # 缓冲区已满说明已有未处理的唤醒，无需再写
+            pass
 
-            task_id = msg.get("task_id")
-            status = msg.get("status")
-            result = msg.get("result")
-            error = msg.get("error")
-            self._tasks.update(task_id, status=status, result=result, error=error, finished_at=time.time())
+    def _wait_events(self, timeout: float) -> None:
+        """同时等待：子进程上报结果、子进程退出、新任务提交；超时用于定期读取环形缓冲区中的日志"""
+        handles = [self._wake_r]
+        if self._result_conn is not None:
+            handles.append(self._result_conn)
+        if self._current_proc is not None:
+            handles.append(self._current_proc.sentinel)
+        ready = multiprocessing.connection.wait(handles, timeout)
+        if self._wake_r in ready:
+            try:
+                while self._wake_r.recv(4096):
+                    pass
+            except (BlockingIOError, OSError):
+                pass
+        # 结果管道中的数据留给 _collect 读取
 
-    def _drain_log_queue(self) -> None:
-        """处理子进程日志队列，将日志添加到主进程的日志收集器"""
-        if self._current_log_queue is None:
+    def _ensure_worker(self) -> None:
+        """常驻子进程不存在或已退出时启动一个新的"""
+        if self._current_proc is not None and self._current_proc.is_alive():
             return
+        # 每个子进程使用新的任务队列和唤醒管道：被终止的子进程可能让旧队列（及其锁）处于不一致状态
+        self._task_queue = mp.SimpleQueue()
+        if self._result_conn is not None:
+            self._result_conn.close()
+        result_r, result_w = mp.Pipe(duplex=False)
+        proc = mp.Process(
+            target=_worker_main,
+            args=(self._task_queue, result_w, self._log_ring, self._dog_ip, self._dog_port),
+            daemon=True,
+        )
+        proc.start()
+        # 写端已传给子进程，主进程关闭自己的副本：子进程退出（包括发送到一半被终止）时读端能读到 EOF
+        result_w.close()
+        self._result_conn = result_r
+        self._current_proc = proc
+
+    def _recv_results(self) -> list:
+        """读出结果管道中已到达的全部任务结果，读到 EOF 时关闭管道"""
+        conn = self._result_conn
+        msgs: list = []
+        if conn is None:
+            return msgs
         try:
-            # 使用超时机制，避免无限等待
-            max_iterations = 100  # 每次最多处理100条，避免阻塞
-            count = 0
-            while count < max_iterations:
-                try:
-                    # 使用超时避免阻塞
-                    msg_type, log_entry = self._current_log_queue.get(timeout=0.01)
-                    if msg_type in ("log", "print"):
-                        # 将子进程的日志添加到主进程的日志收集器
-                        _log_collector.append(log_entry)
-                    count += 1
-                except queue.Empty:
-                    break
-                except Exception:
-                    break
+            while conn.poll():
+                msgs.append(_loads(conn.recv_bytes()))
+        except (EOFError, OSError, ValueError):
+            conn.close()
+            self._result_conn = None
+        return msgs
+
+    def _drain_ring(self) -> None:
+        """读出子进程写入环形缓冲区的日志，添加到主进程的日志收集器"""
+        try:
+            lines = self._log_ring.read_lines()
         except Exception:
-            pass
+            return
+        if not lines:
+            return
+        # print 输出（P）补上时间戳，与logging格式一致；整批一次写入日志收集器
+        prefix = f"[{_timestamp()}] INFO "
+        _log_collector.extend([prefix + line[1:] if line[0] == "P" else line[1:] for line in lines])
+
+    def _collect(self) -> None:
+        """处理子进程上报的日志和任务结果"""
+        # 先取结果再读日志：子进程写完本任务的日志才发送结果，此时日志已在环形缓冲区里，
+        # 先读进收集器再更新任务表，客户端看到任务结束后立刻拉取 /logs 就能拿到完整日志
+        msgs = self._recv_results()
+        self._drain_ring()
+        if not msgs:
+            return
+        now = time.time()
+        self._tasks.update_many(
+            (msg.get("task_id"), {"status": msg.get("status"), "result": msg.get("result"), "error": msg.get("error"), "finished_at": now})
+            for msg in msgs
+        )
+        if any(msg.get("task_id") == self._current_task_id for msg in msgs):
+            self._current_task_id = None
 
     def _loop(self) -> None:
         while not self._stop_event.is_set():
-            self._drain_worker_results()
-            self._drain_log_queue()  # 处理日志队列
-
-            # 回收当前子进程
+            # 结果、子进程退出、新任务都会立即唤醒，超时只用于定期读取日志：
+            # 空闲且队列里还有任务时不等待；有任务在跑时 0.1 秒读一次日志；完全空闲时只有后台线程的零星日志，1 秒读一次
+            if self._current_task_id is None:
+                timeout = 0 if not self._queue.empty() else 1.0
+            else:
+                timeout = 0.1
+            self._wait_events(timeout)
+            self._collect()  # 处理日志和任务结果
+
+            # 回收已退出（崩溃或被急停终止）的子进程
             if self._current_proc is not None and not self._current_proc.is_alive():
-                # 处理剩余的日志（多次处理确保不遗漏）
-                for _ in range(10):  # 最多处理10轮，确保所有日志都被收集
-                    self._drain_log_queue()
-                    if self._current_log_queue is None:
-                        break
-                    # 短暂等待，让子进程有时间发送最后的日志
-                    time.sleep(0.05)
+                # 子进程已退出，写入都已完成，读一次即可取完剩余结果和日志
+                self._collect()
                 
                 exitcode = self._current_proc.exitcode
                 if self._current_task_id:
@@ -391,15 +749,17 @@ class CommandService:
 
                 self._current_proc = None
                 self._current_task_id = None
-                self._current_log_queue = None
+                if exitcode == -signal.SIGTERM:
+                    # 被急停终止：立即预热新的子进程，急停后的下一个任务不再等待子进程启动
+                    # （其他原因退出的不在这里重启，避免子进程启动即崩溃时反复重启）
+                    self._ensure_worker()
 
             # 有任务在跑就不启动新任务
-            if self._current_proc is not None:
-                time.sleep(0.05)
+            if self._current_task_id is not None:
                 continue
 
             try:
-                task_id = self._queue.get(timeout=0.1)
+                task_id = self._queue.get_nowait()
             except queue.Empty:
                 continue
 
@@ -410,130 +770,320 @@ class CommandService:
             payload = t.get("payload") or {}
             self._tasks.update(task_id, status="running", started_at=time.time())
 
-            # 创建子进程专用的日志队列
-            log_queue = mp.Queue()
-            
-            proc = mp.Process(
-                target=_worker_run,
-                args=(task_id, payload, self._dog_ip, self._dog_port, self._result_queue, log_queue),
-                daemon=True,
-            )
-            proc.start()
-            self._current_proc = proc
+            self._ensure_worker()
             self._current_task_id = task_id
-            self._current_log_queue = log_queue
+            self._task_queue.put((task_id, payload))
 
 
 _SERVICE: Optional[CommandService] = None
 
+# HTTP 服务基于标准库 asyncio：所有连接共用一个事件循环线程，不再为每个连接创建线程
+SERVER_VERSION = "DogLLMExec/0.4"
+
+_STATUS_TEXT = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+}
+
+
+class _Request:
+    __slots__ = ("method", "path", "version", "headers", "body", "keep_alive")
+
+    def __init__(self, method: str, path: str, version: str, headers: Dict[str, str], body: bytes) -> None:
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+        # HTTP/1.1 默认保持连接，HTTP/1.0 需显式 keep-alive
+        conn = headers.get("connection", "").lower()
+        self.keep_alive = conn == "keep-alive" if version == "HTTP/1.0" else conn != "close"
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[_Request]:
+    """读取一个 HTTP 请求，连接关闭时返回 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, version = line.decode("latin-1").split()
+    headers: Dict[str, str] = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+
+    length_str = headers.get("content-length")
+    if length_str:
+        length = int(length_str)
+        body = await reader.readexactly(length) if length > 0 else b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        # 分块上传按块长度读取，不必等客户端半关闭连接
+        body = await _read_chunked(reader)
+    else:
+        # 既无 Content-Length 也非分块传输时请求体长度为 0（RFC 7230 3.3.3），
+        # 不能读到连接关闭，否则 `curl -X POST .../emergency_stop` 会一直挂起
+        body = b""
+    return _Request(method, path, version, headers, body)
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    """读取 Transfer-Encoding: chunked 的请求体（忽略块扩展和尾部头）"""
+    parts = []
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0], 16)
+        if size == 0:
+            break
+        parts.append(await reader.readexactly(size))
+        await reader.readline()  # 块末尾的 CRLF
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    return b"".join(parts)
+
+
+def _read_json(req: _Request) -> Dict[str, Any]:
+    body = req.body
+    if not body:
+        return {}
+    # 常见情况：请求体本身就是 JSON 对象/数组，直接解析（JSON 允许尾部空白）
+    if body[0] in b"{[":
+        return _loads(body)
+
+    # 直接解析 bytes（orjson / json.loads 都支持），不再先解码成 str
+    data = body.strip()
+    if len(data) >= 2 and data[0] == 0x27 and data[-1] == 0x27:  # 兼容被单引号包住的请求体
+        data = data[1:-1]
+    return _loads(data)
+
+
+# 响应头中固定不变的部分预先编码成 bytes，每次响应只需补上 Content-Length
+def _connection_header(keep_alive: bool) -> str:
+    return f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+
+
+_JSON_HEADS: Dict[Tuple[int, bool], bytes] = {
+    (code, keep_alive): (
+        f"HTTP/1.1 {code} {text}\r\n"
+        f"Server: {SERVER_VERSION}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        + _connection_header(keep_alive)
+        + "Content-Length: "
+    ).encode("latin-1")
+    for code, text in _STATUS_TEXT.items()
+    for keep_alive in (True, False)
+}
+
+_CHUNKED_JSON_HEADS: Dict[bool, bytes] = {
+    keep_alive: (
+        "HTTP/1.1 200 OK\r\n"
+        f"Server: {SERVER_VERSION}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Transfer-Encoding: chunked\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        + _connection_header(keep_alive)
+        + "\r\n"
+    ).encode("latin-1")
+    for keep_alive in (True, False)
+}
+
+_OPTIONS_HEADS: Dict[bool, bytes] = {
+    keep_alive: (
+        "HTTP/1.1 204 No Content\r\n"
+        f"Server: {SERVER_VERSION}\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+        "Access-Control-Allow-Headers: Content-Type\r\n"
+        + _connection_header(keep_alive)
+        + "\r\n"
+    ).encode("latin-1")
+    for keep_alive in (True, False)
+}
+
+
+# 固定不变的响应体预先序列化（_send_json 直接写出 bytes 响应体）
+_OK_BODY = _dumps({"ok": True})
+_NOT_FOUND_BODY = _dumps({"ok": False, "error": "not found"})
+_BAD_REQUEST_BODY = _dumps({"ok": False, "error": "bad request"})
+_MISSING_TASK_ID_BODY = _dumps({"ok": False, "error": "missing task_id"})
+_TASK_NOT_FOUND_BODY = _dumps({"ok": False, "error": "task not found"})
+
+
+def _send_json(writer: asyncio.StreamWriter, code: int, body: Any, keep_alive: bool) -> None:
+    data = body if isinstance(body, bytes) else _dumps(body)
+    writer.write(b"%s%d\r\n\r\n%s" % (_JSON_HEADS[code, keep_alive], len(data), data))
+
+
+class _LogsBody:
+    """/logs 的响应体：由 _send_logs_chunked 逐行流式输出，不先拼成一整块 JSON"""
+    __slots__ = ("since", "logs")
+
+    def __init__(self, since: int, logs: list) -> None:
+        self.since = since
+        self.logs = logs
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"ok": True, "logs": self.logs, "count": len(self.logs), "since": self.since}
+
+
+def _chunk(data: bytes) -> bytes:
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+async def _send_logs_chunked(writer: asyncio.StreamWriter, body: _LogsBody, req: _Request) -> None:
+    """以 Transfer-Encoding: chunked 输出 /logs：每条日志单独编码成一个 chunk 写出"""
+    if req.version == "HTTP/1.0":
+        # HTTP/1.0 不支持 chunked
+        _send_json(writer, 200, body.as_dict(), req.keep_alive)
+        return
+    writer.write(_CHUNKED_JSON_HEADS[req.keep_alive])
+    writer.write(_chunk(b'{"ok":true,"count":%d,"since":%d,"logs":[' % (len(body.logs), body.since)))
+    sep = b""
+    for line in body.logs:
+        writer.write(_chunk(sep + _dumps(line)))
+        sep = b","
+        # 发送缓冲区超过高水位时等待对端读取，避免整份响应堆在内存里
+        await writer.drain()
+    writer.write(_chunk(b"]}") + b"0\r\n\r\n")
+
+
+def _send_options(writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+    writer.write(_OPTIONS_HEADS[keep_alive])
+
+
+def _handle_post(req: _Request) -> Tuple[int, Any]:
+    if req.path == "/execute":
+        payload = _read_json(req)
+        if not payload:
+            return 400, {"ok": False, "error": "空请求体或JSON解析失败"}
+        task_id = _SERVICE.submit(payload)  # type: ignore
+        return 200, {"ok": True, "task_id": task_id}
+
+    if req.path == "/emergency_stop":
+        _SERVICE.emergency_stop()  # type: ignore
+        return 200, {"ok": True, "message": "已急停"}
+
+    return 404, _NOT_FOUND_BODY
+
+
+# /logs、/result 长轮询的最长等待时间（秒）
+LONG_POLL_MAX_WAIT = 30.0
+
+
+def _wait_param(qs: Dict[str, str]) -> float:
+    """解析 wait 参数（秒），限制在 [0, LONG_POLL_MAX_WAIT]，非法值按 0 处理"""
+    try:
+        return min(max(float(qs.get("wait", "0")), 0.0), LONG_POLL_MAX_WAIT)
+    except ValueError:
+        return 0.0
 
-class Handler(BaseHTTPRequestHandler):
-    server_version = "DogLLMExec/0.3"
-
-    def _send_json(self, code: int, body: Dict[str, Any]) -> None:
-        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
-        self.send_response(code)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
-        self.wfile.write(data)
-
-    def _read_json(self) -> Dict[str, Any]:
-        length_str = self.headers.get("Content-Length")
-        raw: bytes
-        if length_str is None or length_str.strip() == "" or length_str.strip() == "0":
-            raw = self.rfile.read()
-        else:
-            length = int(length_str)
-            raw = self.rfile.read(length) if length > 0 else b""
-
-        if not raw:
-            return {}
-
-        text = raw.decode("utf-8", errors="ignore").strip()
-        if len(text) >= 2 and text[0] == "'" and text[-1] == "'":
-            text = text[1:-1]
-        return json.loads(text)
-
-    def do_OPTIONS(self) -> None:
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-
-    def do_POST(self) -> None:
-        global _SERVICE
-        try:
-            if self.path == "/execute":
-                payload = self._read_json()
-                if not payload:
-                    self._send_json(400, {"ok": False, "error": "空请求体或JSON解析失败"})
-                    return
-                task_id = _SERVICE.submit(payload)  # type: ignore
-                self._send_json(200, {"ok": True, "task_id": task_id})
-                return
 
-            if self.path == "/emergency_stop":
-                _SERVICE.emergency_stop()  # type: ignore
-                self._send_json(200, {"ok": True, "message": "已急停"})
-                return
+async def _get_health(qs: Dict[str, str]) -> Tuple[int, Any]:
+    return 200, _OK_BODY
 
-            self._send_json(404, {"ok": False, "error": "not found"})
-        except Exception as e:
-            self._send_json(500, {"ok": False, "error": str(e)})
 
-    def do_GET(self) -> None:
-        global _SERVICE
-        try:
-            if self.path == "/health":
-                self._send_json(200, {"ok": True})
-                return
+async def _get_result(qs: Dict[str, str]) -> Tuple[int, Any]:
+    task_id = qs.get("task_id")
+    if not task_id:
+        return 400, _MISSING_TASK_ID_BODY
+    wait = _wait_param(qs)
+    if wait > 0:
+        # 任务结束前在事件循环上挂起等待（不占用线程），客户端不必反复轮询
+        body = await _SERVICE.wait_task(task_id, wait)  # type: ignore
+    else:
+        # 已序列化的响应体按任务缓存，任务状态不变时重复查询不再重新序列化
+        body = _SERVICE.get_task_json(task_id)  # type: ignore
+    if body is None:
+        return 404, _TASK_NOT_FOUND_BODY
+    return 200, body
 
-            if self.path.startswith("/result"):
-                task_id = None
-                if "?" in self.path:
-                    _, q = self.path.split("?", 1)
-                    for part in q.split("&"):
-                        if part.startswith("task_id="):
-                            task_id = part.split("=", 1)[1]
-                if not task_id:
-                    self._send_json(400, {"ok": False, "error": "missing task_id"})
-                    return
-                t = _SERVICE.get_task(task_id)  # type: ignore
-                if not t:
-                    self._send_json(404, {"ok": False, "error": "task not found"})
-                    return
-                self._send_json(200, {"ok": True, "task": t})
-                return
 
-            if self.path.startswith("/logs"):
-                # 获取日志，支持 since 参数（起始索引）
-                since = 0
-                if "?" in self.path:
-                    _, q = self.path.split("?", 1)
-                    for part in q.split("&"):
-                        if part.startswith("since="):
-                            try:
-                                since = int(part.split("=", 1)[1])
-                            except ValueError:
-                                pass
-                logs = _log_collector.get_logs(since)
-                self._send_json(200, {"ok": True, "logs": logs, "count": len(logs), "since": since})
-                return
+async def _get_logs(qs: Dict[str, str]) -> Tuple[int, Any]:
+    # 获取日志，支持 since 参数（起始索引）和 wait 参数（没有新日志时最多等待的秒数，长轮询）
+    try:
+        since = int(qs.get("since", "0"))
+    except ValueError:
+        since = 0
+    wait = _wait_param(qs)
+    if wait > 0:
+        # 在事件循环上挂起等待，不阻塞其他请求，也不占用线程
+        logs = await _log_collector.wait_logs(since, wait)
+    else:
+        logs = _log_collector.get_logs(since)
+    return 200, _LogsBody(since, logs)
+
+
+_GET_ROUTES = {
+    "/health": _get_health,
+    "/result": _get_result,
+    "/logs": _get_logs,
+}
+
+
+async def _handle_get(req: _Request) -> Tuple[int, Any]:
+    u = urlsplit(req.path)
+    handler = _GET_ROUTES.get(u.path)
+    if handler is None:
+        return 404, _NOT_FOUND_BODY
+    return await handler(dict(parse_qsl(u.query)))
+
+
+async def _handle_conn(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    peer = writer.get_extra_info("peername")
+    client = peer[0] if peer else "-"
+    try:
+        while True:
+            try:
+                req = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                _send_json(writer, 400, _BAD_REQUEST_BODY, False)
+                break
+            if req is None:
+                break
+
+            # 路由处理均为非阻塞的内存操作（提交任务/查询状态/急停），直接在事件循环中执行
+            if req.method == "OPTIONS":
+                code = 204
+                _send_options(writer, req.keep_alive)
+            else:
+                try:
+                    if req.method == "POST":
+                        code, body = _handle_post(req)
+                    elif req.method == "GET":
+                        code, body = await _handle_get(req)
+                    else:
+                        code, body = 404, _NOT_FOUND_BODY
+                except Exception as e:
+                    code, body = 500, {"ok": False, "error": str(e)}
+                if isinstance(body, _LogsBody):
+                    await _send_logs_chunked(writer, body, req)
+                else:
+                    _send_json(writer, code, body, req.keep_alive)
+            await writer.drain()
+
+            # 完全跳过 /logs 轮询请求的日志记录（避免刷屏），这些请求本身是用于获取日志的，不需要记录
+            if not req.path.startswith("/logs"):
+                logging.info('%s - "%s %s %s" %d -', client, req.method, req.path, req.version, code)
+            if not req.keep_alive:
+                break
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
 
-            self._send_json(404, {"ok": False, "error": "not found"})
-        except Exception as e:
-            self._send_json(500, {"ok": False, "error": str(e)})
 
-    def log_message(self, fmt: str, *args: Any) -> None:
-        message = fmt % args
-        # 完全跳过 /logs 轮询请求的日志记录（避免刷屏），这些请求本身是用于获取日志的，不需要记录
-        if "/logs" in message:
-            return
-        log_msg = "%s - %s" % (self.address_string(), message)
-        logging.info(log_msg)
+async def _serve(listen: str, port: int) -> None:
+    server = await asyncio.start_server(_handle_conn, listen, port)
+    logging.info(f"HTTP服务已启动: http://{listen}:{port}")
+    async with server:
+        await server.serve_forever()
 
 
 def main() -> None:
@@ -549,13 +1099,17 @@ def main() -> None:
     global _SERVICE
     _SERVICE = CommandService(args.dog_ip, args.dog_port)
 
-    httpd = ThreadingHTTPServer((args.listen, args.port), Handler)
-    logging.info(f"HTTP服务已启动: http://{args.listen}:{args.port}")
-    httpd.serve_forever()
+    asyncio.run(_serve(args.listen, args.port))
 
 
 if __name__ == "__main__":
     # 在 davinci-mini 这类环境上强制 fork 可能导致主进程不稳定/崩溃。
-    # 使用 spawn 更保守：子进程完全重新启动解释器，避免继承主进程的网络/线程状态。
-    mp.set_start_method('spawn', force=True)
+    # 使用 forkserver：子进程由一个干净的单线程 server 进程 fork 出来，同样不继承主进程的网络/线程状态；
+    # server 进程只预先导入本模块；命令执行器不能预导入：导入 dog_llm_exec 会连带导入 listener.py，
+    # 后者在导入时就绑定状态监听 UDP 端口，forkserver 持有该端口会让旧报文串进重启后的子进程。平台不支持时回退到 spawn。
+    try:
+        mp.set_start_method('forkserver', force=True)
+        mp.set_forkserver_preload(['__main__'])
+    except ValueError:
+        mp.set_start_method('spawn', force=True)
     main()
@@ -12,14 +12,16 @@
 
 import logging
 import math
+import struct
 import threading
 import time
 from typing import List, Optional, Tuple
 
 from command.udp_command import RobotState
-from sendcommand.SendToCommand import perform_action
+from sendcommand.SendToCommand import encode_command, perform_action, send_packet
 from speeds.sportspeed import go_straight, translate_left_and_right, revolve_left_and_right
-from robotstatuswatcher.listener import status_listener
+from robotstatuswatcher.listener import RADAR_STATUS, status_listener
+from threading_utils.ThreadTemplates import paced_send
 
 # 尝试导入雷达监听函数
 try:
@@ -29,6 +31,10 @@ except ImportError:
     RADAR_LISTENER_AVAILABLE = False
     logging.warning("雷达监听函数不可用，将使用基本状态监听")
 
+# 雷达状态缓冲区中距离字段（第 4 个 double）的读取格式与偏移
+_RADAR_DISTANCE = struct.Struct('<d')
+_RADAR_DISTANCE_OFFSET = 3 * _RADAR_DISTANCE.size
+
 # 注意：不在这里调用 logging.basicConfig()，因为主进程已经配置了日志系统
 # 这样可以避免日志重复输出
 
@@ -60,12 +66,16 @@ class ObstacleAvoidanceManager:
             3: [(-46.0,), (91.0,), (-30.0,)]  # revolve_left_and_right: 左转-46度，右转91度，左转-30度
         }
         self.avoid_actions_sequence = [(3, 0), (1, 0), (3, 1), (1, 1), (3, 2)]  # 避障动作序列
+        self._avoid_script = self._build_avoid_script()  # 预先展开的避障指令序列
         
-        # 检测结果（线程安全）
-        self._radar_status_list: List[float] = []  # 雷达状态列表 [x, y, z, distance, ...]
-        self._radar_lock = threading.Lock()
-        self._camera_result: List[str] = []  # 摄像头检测结果 ['staircase'] 或 ['hole']
-        self._camera_lock = threading.Lock()
+        # 检测结果
+        # 雷达状态缓冲区：按 RADAR_STATUS 布局存放 [basic_state, gait_state, motion_state, distance]，
+        # 只有一个监听线程写入，写入/读取都是单次 C 调用，无需加锁；初始距离为无穷大（不触发避障）
+        self._radar_buf = bytearray(RADAR_STATUS.size)
+        RADAR_STATUS.pack_into(self._radar_buf, 0, 0, 0, 0, float('inf'))
+        # 摄像头检测结果 'staircase' 或 'hole'：只有推理线程写入，读取只需要最新值，
+        # 单个引用的赋值/读取本身是原子的，不需要加锁
+        self._camera_result_latest: Optional[str] = None
         
         # 检测线程
         self._radar_thread: Optional[threading.Thread] = None
@@ -100,7 +110,7 @@ class ObstacleAvoidanceManager:
                 from obstacle_model_cap import inference_loop
                 self._camera_thread = threading.Thread(
                     target=inference_loop,
-                    args=(self._camera_result, self._camera_lock),
+                    args=(self._on_camera_result,),
                     daemon=True
                 )
                 self._camera_thread.start()
@@ -120,31 +130,22 @@ class ObstacleAvoidanceManager:
     
     def _radar_detection_loop(self):
         """雷达检测循环"""
-        # 使用线程安全的雷达状态列表
-        radar_status_list = []
-        
         if RADAR_LISTENER_AVAILABLE:
-            # 使用专门的雷达监听函数（会更新 radar_status_list）
+            # 雷达监听线程收到状态帧后直接写入 self._radar_buf，check_obstacle 立即可见，无需再轮询拷贝
             def radar_listener_wrapper():
-                status_listener_radar(radar_status_list, self._radar_lock)
+                status_listener_radar(self._radar_buf)
             
             radar_listener_thread = threading.Thread(target=radar_listener_wrapper, daemon=True)
             radar_listener_thread.start()
+            return
         
         while self._running:
             try:
-                if RADAR_LISTENER_AVAILABLE:
-                    # 从雷达监听线程更新的列表中获取距离信息
-                    with self._radar_lock:
-                        if radar_status_list and len(radar_status_list) >= 4:
-                            self._radar_status_list = radar_status_list[:4]  # [basic_state, gait_state, motion_state, distance]
-                else:
-                    # 降级方案：使用基本状态监听（不包含距离信息）
-                    status = status_listener()
-                    if status and len(status) >= 3:
-                        with self._radar_lock:
-                            # 基本状态监听不包含距离，设置为无穷大（不会触发避障）
-                            self._radar_status_list = status[:3] + [float('inf')]
+                # 降级方案：使用基本状态监听（不包含距离信息）
+                status = status_listener()
+                if status and len(status) >= 3:
+                    # 基本状态监听不包含距离，设置为无穷大（不会触发避障）
+                    RADAR_STATUS.pack_into(self._radar_buf, 0, *status[:3], float('inf'))
             except Exception as e:
                 logging.error(f"雷达检测异常: {e}")
             time.sleep(0.1)  # 100ms检测一次
@@ -154,78 +155,56 @@ class ObstacleAvoidanceManager:
         if not self.enable_radar:
             return False
         
-        with self._radar_lock:
-            if self._radar_status_list and len(self._radar_status_list) >= 4:
-                distance = self._radar_status_list[3] if len(self._radar_status_list) > 3 else float('inf')
-                if distance <= self.obs_void_distance:
-                    return True
-        return False
+        # 不加锁：直接从缓冲区读出距离字段（一次 8 字节读取），读到的只可能是上一帧或最新一帧
+        distance, = _RADAR_DISTANCE.unpack_from(self._radar_buf, _RADAR_DISTANCE_OFFSET)
+        return distance <= self.obs_void_distance
+    
+    def _on_camera_result(self, object_class: str):
+        """推理线程回调：记录最新的检测结果"""
+        self._camera_result_latest = object_class
     
     def check_staircase(self) -> bool:
         """检查是否检测到楼梯"""
         if not self.enable_camera:
             return False
         
-        with self._camera_lock:
-            return self._camera_result == ['staircase']
+        return self._camera_result_latest == 'staircase'
     
     def check_hole(self) -> bool:
         """检查是否检测到坑洞"""
         if not self.enable_camera:
             return False
         
-        with self._camera_lock:
-            return self._camera_result == ['hole']
+        return self._camera_result_latest == 'hole'
+    
+    def _build_avoid_script(self) -> List[Tuple[str, bytes, float]]:
+        """把避障序列预先展开为 (名称, 指令报文, 持续秒数) 列表，执行时只需按节拍发送"""
+        # 动作编号 -> (名称, 速度/时间换算函数, 指令码)
+        actions = {
+            1: ("ACTION_go_straight", go_straight, 0x21010130),
+            3: ("ACTION_revolve_left_and_right", revolve_left_and_right, 0x21010135),
+        }
+        script = []
+        for action_id, params_index in self.avoid_actions_sequence:
+            name, convert, code = actions[action_id]
+            times, val = convert(*self.avoid_actions_params[action_id][params_index])
+            script.append((name, encode_command(code, val, 0), times))
+        return script
     
     def execute_avoid_sequence(self):
         """执行避障序列"""
         logging.info("执行避障序列...")
         
-        from threading_utils.ThreadTemplates import MyRepeatThread
-        from sendcommand.SendToCommand import perform_action
-        
-        # 动作包装函数（参考 ThreadTemplates.py）
-        def action_go_straight(long, speedgear=3):
-            times, val = go_straight(long, speedgear)
-            thread = MyRepeatThread(
-                "ACTION_go_straight",
-                perform_action,
-                0.1, times,
-                self.sfd, self.target_address, 0x21010130, val, 0
-            )
-            return thread
-        
-        def action_revolve_left_and_right(angle):
-            times, val = revolve_left_and_right(angle)
-            thread = MyRepeatThread(
-                "ACTION_revolve_left_and_right",
-                perform_action,
-                0.1, times,
-                self.sfd, self.target_address, 0x21010135, val, 0
-            )
-            return thread
-        
-        # 动作字典映射
-        actions_dict = {
-            1: action_go_straight,
-            3: action_revolve_left_and_right
-        }
-        
-        # 遍历避障动作序列
-        for idx, (action_id, params_index) in enumerate(self.avoid_actions_sequence):
+        # 遍历预先展开的避障动作序列，在当前线程内直接发送，不再为每一步创建线程
+        # 发送失败（如 OSError）直接抛出，由下面的收尾逻辑发送停止指令并终止整个序列
+        for idx, (name, pkt, seconds) in enumerate(self._avoid_script):
             try:
-                action_func = actions_dict.get(action_id, None)
-                if action_func:
-                    avoid_params = self.avoid_actions_params[action_id][params_index]
-                    if isinstance(avoid_params, tuple):
-                        avoid_thread = action_func(*avoid_params)
-                        avoid_thread.start()
-                        avoid_thread.join()
-                        # 每个动作后等待稳定
-                        if idx < len(self.avoid_actions_sequence) - 1:  # 最后一个动作不需要额外等待
-                            time.sleep(0.8)  # 等待动作稳定
+                paced_send(send_packet, seconds, 0.1, self.sfd, self.target_address, pkt)
+                # 每个动作后等待稳定
+                if idx < len(self._avoid_script) - 1:  # 最后一个动作不需要额外等待
+                    time.sleep(0.8)  # 等待动作稳定
             except Exception as e:
-                logging.error(f"避障序列第 {idx+1} 个动作执行失败: {e}")
+                logging.error(f"避障序列第 {idx+1} 个动作 {name} 执行失败: {e}")
                 # 如果某个动作失败，发送停止指令
                 perform_action(self.sfd, self.target_address, 0x21010407, 0, 0)
                 raise
@@ -38,27 +38,62 @@ except ImportError as e:
 # 注意：不在这里调用 logging.basicConfig()，因为主进程已经配置了日志系统
 # 这样可以避免日志重复输出和添加多余的 handler
 
+class LatestFrame:
+    """单槽"最新帧"缓冲：采集线程不断覆盖，推理线程取走最新的一帧，来不及处理的旧帧直接丢弃"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+
+    def put(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """取走最新一帧，最多等待 timeout 秒，超时返回 None"""
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+def capture_loop(latest_frame):
+    """采集线程：持续获取图像放入 latest_frame，与推理并行进行"""
+    while True:
+        try:
+            latest_frame.put(getImage())
+        except Exception as e:
+            logging.error(f"获取图像异常: {e}")
+            time.sleep(0.5)
+
 # 定义Image_inference函数，用于执行图像推理
-def Image_inference(model, labels_dict):
+def Image_inference(model, labels_dict, use_aipp=False, img=None):
     try:
-        if getImage is None:
-            return []
-        img = getImage()  # 获取图像
-        frame = img.copy()  # 复制图像用于后续处理
+        if img is None:
+            if getImage is None:
+                return []
+            img = getImage()  # 获取图像
+        frame = img  # 原始图像（每次获取的都是新数组，无需复制）
         # 使用letterbox函数对图像进行尺寸调整和填充
         img, scale_ratio, pad_size = letterbox(frame, new_shape=[640, 640])
         ill_sets = []  # 初始化用于存储检测结果的列表
-        # 对图像进行格式转换和归一化处理，准备输入到模型中
-        img = img[:, :, ::-1].transpose(2, 0, 1)
-        img = np.expand_dims(img, 0).astype(np.float32)
-        img = np.ascontiguousarray(img) / 255.0
-        img = Tensor(img)
+        if use_aipp:
+            # 模型内置 AIPP：BGR->RGB 与 /255 在 NPU 上完成，直接输入 uint8 的 (1,640,640,3) 图像
+            img = Tensor(np.ascontiguousarray(img[np.newaxis]))
+        else:
+            # 对图像进行格式转换和归一化处理，准备输入到模型中：
+            # blobFromImage 一次完成 BGR->RGB、HWC->NCHW、转 float32 和 /255，直接得到连续的 (1,3,640,640) 数组
+            img = cv2.dnn.blobFromImage(img, scalefactor=1.0 / 255.0, swapRB=True, crop=False)
+            img = Tensor(img)
         # 使用模型进行推理
         output = model.infer([img])[0]
         output.to_host()  # 将推理结果从设备传输到主机
-        output = np.array(output)  # 将推理结果转换为NumPy数组
-        # 使用nms函数进行非极大值抑制处理
-        boxout = nms(torch.tensor(output), conf_thres=0.7, iou_thres=0.5)
+        # 直接以 NumPy 视图访问主机侧结果，不再复制一份（output 在本函数内保持引用，内存不会被释放）
+        pred = np.asarray(output)
+        # 使用nms函数进行非极大值抑制处理（from_numpy 与数组共享内存，不再额外拷贝一份；
+        # nms 内部先按置信度筛选再调用 torchvision.ops.nms，不会修改 pred 本身）
+        boxout = nms(torch.from_numpy(pred), conf_thres=0.7, iou_thres=0.5)
         # 将nms处理后的预测结果转换为NumPy数组
         pred_all = boxout[0].numpy()
         # 调整坐标点以适应原始图像尺寸
@@ -89,8 +124,8 @@ def model_init(model_path, device_id, label_path):
         logging.error(f"初始化模型失败: {e}")
         raise
 
-def inference_loop(result, result_lock):
-    """图像推理循环，检测楼梯和坑洞"""
+def inference_loop(on_result):
+    """图像推理循环，检测楼梯和坑洞；连续两次检测到同一类别时调用 on_result(类别名)"""
     # 初始化一个空列表，用于存储推理结果
     list0 = []
     # 初始化计数器
@@ -101,6 +136,11 @@ def inference_loop(result, result_lock):
     # 模型路径（相对于当前文件）
     current_dir = os.path.dirname(os.path.abspath(__file__))
     model_path = os.path.join(current_dir, 'avoidance_models', '1.om')
+    # 存在带 AIPP 预处理的模型（见 avoidance_models/aipp.cfg）时优先使用，输入预处理移到 NPU 上
+    aipp_model_path = os.path.join(current_dir, 'avoidance_models', '1_aipp.om')
+    use_aipp = os.path.exists(aipp_model_path)
+    if use_aipp:
+        model_path = aipp_model_path
     label_path = os.path.join(current_dir, 'avoidance_models', 'predefined_classes.txt')
     
     try:
@@ -111,11 +151,22 @@ def inference_loop(result, result_lock):
         logging.warning("摄像头检测功能将不可用")
         return
 
+    if getImage is None:
+        logging.warning("摄像头不可用，摄像头检测功能将不可用")
+        return
+
+    # 采集与推理并行：采集线程只保留最新一帧，推理耗时期间采到的帧直接可用
+    latest_frame = LatestFrame()
+    threading.Thread(target=capture_loop, args=(latest_frame,), daemon=True).start()
+
     try:
         # 进入一个无限循环，持续进行推理
         while True:
+            img = latest_frame.take(timeout=1.0)
+            if img is None:
+                continue
             # 调用 Image_inference 函数进行图像推理，并获取结果
-            ill_sets = Image_inference(model, labels_dict)
+            ill_sets = Image_inference(model, labels_dict, use_aipp, img)
             # 如果推理结果为空，继续下一次循环
             if not ill_sets:
                 time.sleep(0.1)
@@ -135,14 +186,10 @@ def inference_loop(result, result_lock):
                     object_class = ill_sets[0][0]
                     # 重置计数器 k 和 list0
                     k, list0 = 0, []
-                    # 使用结果锁进行线程安全操作
-                    with result_lock:
-                        # 清空结果列表
-                        result.clear()
-                        # 将新的结果添加到结果列表中
-                        result.append(object_class)
-                        # 打印当前结果
-                        logging.info(f'检测到: {result}')
+                    # 上报新的结果
+                    on_result(object_class)
+                    # 打印当前结果
+                    logging.info(f'检测到: {[object_class]}')
                 # 如果集合长度不为 1，表示两次推理结果不一致
                 else:
                     # 设置 object_class 为 None
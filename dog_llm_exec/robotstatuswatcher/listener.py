@@ -1,51 +1,112 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-
-import sys
-# 这个相对导入会在 dog_llm_exec.py 中被替换为本地导入
-# sys.path.append('../') 
-
-from command.udp_command import *
-from socketnetwork import network_utils
-
-sock_fd = network_utils.set_up_recvfrom_socket_and_address()
-
-def status_listener_radar(status_list, status_list_lock):
-    while True:
-        recv_data, _ = sock_fd.recvfrom(1024)
-        recv_num = len(recv_data)
-        if recv_num == 108:
-            dr = JointStateReceived(recv_data)
-            if dr.code == 2306:
-                joint_angle = JointAngle(dr)
-            if dr.code == 2307:
-                joint_speed = JointSpeed(dr)
-        elif recv_num == 212:
-            dr, status_list_temp = RobotState(recv_data), []
-            if dr.code == 2305:
-                if dr.robot_basic_state != 0:
-                    status_list_temp.append(dr.robot_basic_state)
-                    status_list_temp.append(dr.robot_gait_state)
-                    status_list_temp.append(dr.robot_motion_state)
-                    status_list_temp.append(dr.distance_ahead)
-                    with status_list_lock:
-                        status_list[:] = status_list_temp
-
-def status_listener():
-    while True:
-        recv_data, _ = sock_fd.recvfrom(1024)
-        recv_num = len(recv_data)
-        if recv_num == 108:
-            dr = JointStateReceived(recv_data)
-            if dr.code == 2306:
-                joint_angle = JointAngle(dr)
-            if dr.code == 2307:
-                joint_speed = JointSpeed(dr)
-        elif recv_num == 212:
-            dr, status_list_temp = RobotState(recv_data), []
-            if dr.code == 2305:
-                if dr.robot_basic_state != 0:
-                    status_list_temp.append(dr.robot_basic_state)
-                    status_list_temp.append(dr.robot_gait_state)
-                    status_list_temp.append(dr.robot_motion_state)
-                    return status_list_temp
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+# 这个相对导入会在 dog_llm_exec.py 中被替换为本地导入
+# sys.path.append('../') 
+
+from command.udp_command import *
+from socketnetwork import network_utils
+
+sock_fd = network_utils.set_up_recvfrom_socket_and_address()
+
+# 接收线程绑定的CPU核（嵌入式主机上为接收线程预留一个核可减少抖动），None 表示不绑定
+RX_CPU = None
+
+def pin_rx_thread(cpu=None):
+    """把当前线程绑定到指定CPU核，平台不支持或绑定失败时忽略"""
+    cpu = RX_CPU if cpu is None else cpu
+    if cpu is None or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print(f"接收线程绑定CPU {cpu} 失败: {e}")
+
+# 每个监听线程持有一块预分配的接收缓冲区，recv_into 直接写入，避免每个报文分配新的 bytes
+# （不需要对端地址，用 recv_into 而不是 recvfrom_into，连地址元组也不再创建）
+# （状态监听与雷达监听可能在不同线程中同时读取同一个 socket，因此缓冲区按线程隔离）
+_rx_local = threading.local()
+
+def _rx_buffer():
+    mv = getattr(_rx_local, 'mv', None)
+    if mv is None:
+        mv = _rx_local.mv = memoryview(bytearray(Command.kDataSize))
+    return mv
+
+
+def _parse_joint(recv_data):
+    """关节状态报文（108 字节）：按 code 解析角度/速度，目前不使用解析结果"""
+    dr = JointStateReceived(recv_data)
+    parse = _JOINT_CODES.get(dr.code)
+    if parse is not None:
+        parse(dr)
+    return None
+
+def _parse_state(recv_data):
+    """状态报文（212 字节）：是有效的状态帧（code 2305 且 basic_state 非 0）则返回 RobotState，否则返回 None"""
+    dr = RobotState(recv_data)
+    if dr.code == 2305 and dr.robot_basic_state != 0:
+        return dr
+    return None
+
+# 按 code 选择关节报文解析类；按报文长度选择解析函数，取代逐个比较的 if/elif
+_JOINT_CODES = {2306: JointAngle, 2307: JointSpeed}
+_LEN_HANDLERS = {108: _parse_joint, 212: _parse_state}
+
+def _recv_states(rx_mv):
+    """持续接收报文，关节报文就地处理，逐个产出有效的状态帧（RobotState）"""
+    while True:
+        recv_num = sock_fd.recv_into(rx_mv)
+        handler = _LEN_HANDLERS.get(recv_num)
+        # 解析结果均为标量，报文视图仅在本轮循环内使用，缓冲区下一轮直接复用
+        if handler is not None:
+            dr = handler(rx_mv[:recv_num])
+            if dr is not None:
+                yield dr
+
+# 雷达状态的固定布局：basic_state, gait_state, motion_state, distance（各一个 double，共 32 字节）
+RADAR_STATUS = struct.Struct('<4d')
+
+def status_listener_radar(radar_buf):
+    """持续接收状态帧，按 RADAR_STATUS 布局写入预分配的 radar_buf（bytearray），每帧不再创建列表
+
+    pack_into 是一次 C 调用，读取方用 unpack_from 读到的总是完整的一帧，不需要加锁。
+    """
+    pin_rx_thread()
+    for dr in _recv_states(_rx_buffer()):
+        RADAR_STATUS.pack_into(radar_buf, 0, dr.robot_basic_state, dr.robot_gait_state,
+                               dr.robot_motion_state, dr.distance_ahead)
+
+def parse_status_packet(recv_data):
+    """解析状态报文，是有效的状态帧则返回 [basic_state, gait_state, motion_state]，否则返回 None"""
+    if len(recv_data) == 212:
+        dr = _parse_state(recv_data)
+        if dr is not None:
+            return [dr.robot_basic_state, dr.robot_gait_state, dr.robot_motion_state]
+    return None
+
+def status_poll(timeout):
+    """最多等待 timeout 秒读取一个报文，是状态帧则返回 [basic_state, gait_state, motion_state]，否则返回 None
+
+    先 select 再非阻塞读取：其他线程抢先读走报文时直接返回 None，不会阻塞在 recvfrom 上。
+    """
+    ready, _, _ = select.select([sock_fd], [], [], timeout)
+    if not ready:
+        return None
+    rx_mv = _rx_buffer()
+    try:
+        recv_num = sock_fd.recv_into(rx_mv, 0, socket.MSG_DONTWAIT)
+    except BlockingIOError:
+        return None
+    return parse_status_packet(rx_mv[:recv_num])
+
+def status_listener():
+    """阻塞直到收到一个有效的状态帧，返回 [basic_state, gait_state, motion_state]"""
+    for dr in _recv_states(_rx_buffer()):
+        return [dr.robot_basic_state, dr.robot_gait_state, dr.robot_motion_state]
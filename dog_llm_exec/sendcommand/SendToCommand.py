@@ -4,16 +4,54 @@
 import socket
 import struct
 import ctypes
+import threading
 from ctypes import c_double, c_uint8, c_int32
 # 这个 import 会在 dog_llm_exec.py 中被正确解析为本地导入
 from command.udp_command import *
 
-def send_command(sfd, target_address, code, parameters_size, type_) -> None:
+_COMMAND_HEAD = struct.Struct('<3i')
+
+# 带参数的指令打包到可复用的缓冲区中；动作线程、心跳、避障线程会并发发送，因此缓冲区按线程隔离
+_tx_local = threading.local()
+
+def _tx_buffer() -> bytearray:
+    buf = getattr(_tx_local, 'buf', None)
+    if buf is None:
+        buf = _tx_local.buf = bytearray(_COMMAND_HEAD.size)
+    return buf
+
+def encode_command(code, parameters_size=0, type_=0) -> bytes:
+    """把一条指令编码为可直接发送的12字节报文（不带参数的指令直接取预打包结果）"""
+    if parameters_size == 0 and type_ == 0:
+        command_head = PACKED_COMMANDS.get(code)
+        if command_head is not None:
+            return command_head
+    return _COMMAND_HEAD.pack(code, parameters_size, type_)
+
+def send_packet(sfd, target_address, data) -> None:
+    """发送一个已编码的报文。
+
+    执行器会 connect 指令 socket（心跳走同一个 socket）：已 connect 的 UDP socket 会把上一个报文引起的
+    ICMP 端口不可达报告在本次 sendto 上（本次报文未发出），运动主机启动/重启期间会出现，错误读出后即已清除，重发一次即可。
+    """
+    try:
+        sfd.sendto(data, target_address)
+    except ConnectionRefusedError:
+        sfd.sendto(data, target_address)
+
+def send_command(sfd, target_address, code, parameters_size=0, type_=0) -> None:
     # 注意：在 Python 中，'type' 是预留关键字，这里我们使用 'type_'
-    command_head = struct.pack('<3i', code, parameters_size, type_)
+    if parameters_size == 0 and type_ == 0:
+        command_head = PACKED_COMMANDS.get(code)
+        if command_head is not None:
+            # 发送命令头部到目标地址
+            send_packet(sfd, target_address, command_head)
+            return
+    command_head = _tx_buffer()
+    _COMMAND_HEAD.pack_into(command_head, 0, code, parameters_size, type_)
     # 发送命令头部到目标地址
-    sfd.sendto(command_head, target_address)
+    send_packet(sfd, target_address, command_head)
 
-def perform_action(sfd, target_address, code, parameters_size=0, type_=0) -> None:
-    # 使用默认的 parameters_size 和 type 的值是 0
-    send_command(sfd, target_address, code, parameters_size, type_)
+# 使用默认的 parameters_size 和 type 的值是 0
+# perform_action 与 send_command 完全一致，直接作为别名，省去每次发送多出的一层 Python 函数调用
+perform_action = send_command
@@ -1,26 +1,60 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-
-import socket
-import struct
-import time
-
-def send_udp_heartbeat_once(sfd, target_address, code=0x21040001, parameters_size=0, type_=0) -> None:
-    """发送一次心跳包，不带循环和关闭socket。"""
-    heartbeat_command = struct.pack('<III', code, parameters_size, type_)
-    sfd.sendto(heartbeat_command, target_address)
-
-
-def send_udp_heartbeat(sfd, target_address, code=0x21040001, parameters_size=0, type=0, heartbeat_interval=0.25) -> None:
-    """原始的心跳函数，带循环，仅供参考，本项目不直接使用。"""
-    heartbeat_command = struct.pack('<III', code, parameters_size, type)
-
-    try:
-        while True:
-            start_time = time.time()
-            sfd.sendto(heartbeat_command, target_address)
-            time.sleep(max(0, heartbeat_interval - (time.time() - start_time)))
-    except KeyboardInterrupt:
-        print("Heartbeat sending stopped by user.")
-    finally:
-        sfd.close()
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import socket
+import struct
+import time
+
+HEARTBEAT_CODE = 0x21040001
+HEARTBEAT_HEAD = struct.Struct('<III')
+# 默认心跳包内容固定不变，模块加载时打包一次
+HEARTBEAT_BYTES = HEARTBEAT_HEAD.pack(HEARTBEAT_CODE, 0, 0)
+# 非阻塞发送标志（Windows 上没有，退化为普通发送）
+_MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)
+
+def new_heartbeat_buffer(code=HEARTBEAT_CODE, parameters_size=0, type_=0) -> bytearray:
+    """预分配并填充一个心跳包缓冲区，供 send_udp_heartbeat_prepacked 反复发送。"""
+    buf = bytearray(HEARTBEAT_HEAD.size)
+    HEARTBEAT_HEAD.pack_into(buf, 0, code, parameters_size, type_)
+    return buf
+
+def send_udp_heartbeat_once(sfd, target_address, code=HEARTBEAT_CODE, parameters_size=0, type_=0) -> None:
+    """发送一次心跳包，不带循环和关闭socket。"""
+    if code == HEARTBEAT_CODE and parameters_size == 0 and type_ == 0:
+        heartbeat_command = HEARTBEAT_BYTES
+    else:
+        heartbeat_command = HEARTBEAT_HEAD.pack(code, parameters_size, type_)
+    sfd.sendto(heartbeat_command, target_address)
+
+def send_udp_heartbeat_prepacked(sfd, heartbeat_buf) -> bool:
+    """在已 connect 到目标地址的 socket 上非阻塞地发送预先打包的心跳包，每次发送不产生新对象。
+
+    发送缓冲区满时直接放弃本次心跳（下一个周期会再发），不阻塞与指令共用的调度线程；返回是否已发出。
+    """
+    try:
+        try:
+            sfd.send(heartbeat_buf, _MSG_DONTWAIT)
+        except ConnectionRefusedError:
+            # 已 connect 的 UDP socket 会把上一个报文引起的 ICMP 端口不可达报告在本次发送上（本次报文未发出），
+            # 运动主机启动/重启期间会出现，错误读出后即已清除，重发一次即可
+            sfd.send(heartbeat_buf, _MSG_DONTWAIT)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def send_udp_heartbeat(sfd, target_address, code=0x21040001, parameters_size=0, type=0, heartbeat_interval=0.25) -> None:
+    """原始的心跳函数，带循环，仅供参考，本项目不直接使用。"""
+    heartbeat_command = HEARTBEAT_HEAD.pack(code, parameters_size, type)
+
+    interval_ns = int(heartbeat_interval * 1e9)
+    try:
+        deadline_ns = time.monotonic_ns()
+        while True:
+            sfd.sendto(heartbeat_command, target_address)
+            deadline_ns += interval_ns
+            time.sleep(max(0, deadline_ns - time.monotonic_ns()) / 1e9)
+    except KeyboardInterrupt:
+        print("Heartbeat sending stopped by user.")
+    finally:
+        sfd.close()
@@ -1,45 +1,177 @@
-import socket
-from typing import *
-
-def setup_socket_and_address(dest_ip = '192.168.1.120', port=43893) -> Tuple[socket.socket, Tuple[str, int]]:
-    # 创建UDP套接字
-    sfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    
-    # 设置目标地址
-    target_address = (dest_ip, port)
-    # print(target_address)
-    
-    return sfd, target_address
-
-
-def set_up_recvfrom_socket_and_address(ip_1='192.168.1.100', ip_2='192.168.1.101', port=43897) -> Optional[socket.socket] :
-    """
-    尝试绑定到主IP地址，若失败，则尝试备用IP地址。
-    
-    :param ip_1: 主IP地址
-    :param ip_2: 备用IP地址
-    :param port: 端口号
-    :return: 绑定了IP地址和端口的UDP套接字，如果两个地址都失败则返回None。
-    """
-    # 创建UDP套接字
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-    # 尝试绑定到IP1地址
-    try:
-        target_address = (ip_1, port)
-        sock.bind(target_address)
-        print(f"成功连接到ip: {ip_1}, port: {port}")
-        return sock
-    except OSError as e:
-        print(f"无法绑定到 ip: {ip_1}, error: {e}")
-
-    # IP1地址失败，尝试备用IP2地址
-    try:
-        target_address = (ip_2, port)
-        sock.bind(target_address)
-        print(f"成功连接到ip: {ip_2}, port: {port}")
-        return sock
-    except OSError as e:
-        print(f"无法绑定到 ip: {ip_2}, error: {e}")
-        sock.close()  # 关闭套接字，释放资源
-        return None
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+from typing import *
+
+# 接收缓冲区大小。内核会把 SO_RCVBUF 截断到 net.core.rmem_max，部署时需相应调大：
+#   sysctl -w net.core.rmem_max=8388608
+RECV_BUF_SIZE = 4 << 20
+# 指令/心跳发送缓冲区大小；指令报文只有 12 字节，256 KiB 足以容纳突发的批量发送
+SEND_BUF_SIZE = 256 << 10
+# 指令/心跳报文的 IP TOS：0x10 为低延迟（IPTOS_LOWDELAY），None 表示不设置
+COMMAND_TOS = 0x10
+
+def setup_socket_and_address(dest_ip = '192.168.1.120', port=43893, sndbuf=SEND_BUF_SIZE, tos=COMMAND_TOS) -> Tuple[socket.socket, Tuple[str, int]]:
+    # 创建UDP套接字
+    sfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # 发送缓冲区与低延迟 TOS 标记；平台不支持或权限不足时保持默认值
+    try:
+        if sndbuf:
+            sfd.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+        if tos is not None and hasattr(socket, 'IP_TOS'):
+            sfd.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, tos)
+    except OSError as e:
+        print(f"设置发送socket选项失败: {e}")
+    
+    # 设置目标地址
+    target_address = (dest_ip, port)
+    # print(target_address)
+    
+    return sfd, target_address
+
+
+def set_up_recvfrom_socket_and_address(ip_1='192.168.1.100', ip_2='192.168.1.101', port=43897, rcvbuf=RECV_BUF_SIZE) -> Optional[socket.socket] :
+    """
+    尝试绑定到主IP地址，若失败，则尝试备用IP地址。
+    
+    :param ip_1: 主IP地址
+    :param ip_2: 备用IP地址
+    :param port: 端口号
+    :param rcvbuf: 接收缓冲区大小（字节），0 表示保持系统默认
+    :return: 绑定了IP地址和端口的UDP套接字，如果两个地址都失败则返回None。
+    """
+    # 创建UDP套接字
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # 关节/状态报文突发时避免内核丢包。不设置 SO_REUSEPORT：第二个执行器绑定同一端口时应直接报错，
+    # 而不是悄悄分走一部分状态报文
+    try:
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    except OSError as e:
+        print(f"设置接收socket选项失败: {e}")
+
+    # 尝试绑定到IP1地址
+    try:
+        target_address = (ip_1, port)
+        sock.bind(target_address)
+        print(f"成功连接到ip: {ip_1}, port: {port}")
+        return sock
+    except OSError as e:
+        print(f"无法绑定到 ip: {ip_1}, error: {e}")
+
+    # IP1地址失败，尝试备用IP2地址
+    try:
+        target_address = (ip_2, port)
+        sock.bind(target_address)
+        print(f"成功连接到ip: {ip_2}, port: {port}")
+        return sock
+    except OSError as e:
+        print(f"无法绑定到 ip: {ip_2}, error: {e}")
+        sock.close()  # 关闭套接字，释放资源
+        return None
+
+
+# ===================================================================
+# sendmmsg 批量发送（Linux），一次系统调用发出多个UDP报文
+# ===================================================================
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)), ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort), ('sin_port', ctypes.c_uint16),
+        ('sin_addr', ctypes.c_uint8 * 4), ('sin_zero', ctypes.c_uint8 * 8),
+    ]
+
+_libc = None
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+except (OSError, AttributeError, TypeError):
+    _libc = None
+
+
+def _buffer_address(data):
+    """返回 bytes/bytearray/memoryview 数据的地址，以及在系统调用期间需要保活的对象"""
+    if isinstance(data, bytes):
+        ptr = ctypes.c_char_p(data)
+        return ctypes.cast(ptr, ctypes.c_void_p).value, ptr
+    arr = (ctypes.c_char * len(data)).from_buffer(data)
+    return ctypes.addressof(arr), arr
+
+
+def _sockaddr_in(address) -> _SockAddrIn:
+    ip, port = address
+    sa = _SockAddrIn()
+    sa.sin_family = socket.AF_INET
+    sa.sin_port = socket.htons(port)
+    sa.sin_addr[:] = socket.inet_aton(ip)
+    return sa
+
+
+class UdpBatch:
+    """预先构建好 mmsghdr 数组的固定报文组，反复发送时每次只剩一次 sendmmsg 调用。
+
+    packets 在对象生命周期内需保持不变；address 为 None 时要求 socket 已 connect。
+    平台不支持 sendmmsg 时退化为逐个 sendto/send。
+    """
+
+    def __init__(self, packets: Sequence, address: Optional[Tuple[str, int]] = None) -> None:
+        self._packets = list(packets)
+        self._address = address
+        self._n = len(self._packets)
+        if _libc is None or not self._n:
+            return
+        self._msgs = (_MMsgHdr * self._n)()
+        self._iovs = (_IOVec * self._n)()
+        self._keepalive = []
+        self._sa = _sockaddr_in(address) if address is not None else None
+        for i, p in enumerate(self._packets):
+            addr, ref = _buffer_address(p)
+            self._keepalive.append(ref)
+            self._iovs[i].iov_base = addr
+            self._iovs[i].iov_len = len(p)
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+            if self._sa is not None:
+                hdr.msg_name = ctypes.addressof(self._sa)
+                hdr.msg_namelen = ctypes.sizeof(self._sa)
+
+    def send(self, sock: socket.socket) -> None:
+        if not self._n:
+            return
+        if _libc is None:
+            for p in self._packets:
+                if self._address is None:
+                    sock.send(p)
+                else:
+                    sock.sendto(p, self._address)
+            return
+
+        sent = 0
+        refused = False
+        while sent < self._n:
+            ret = _libc.sendmmsg(sock.fileno(), ctypes.addressof(self._msgs) + sent * ctypes.sizeof(_MMsgHdr), self._n - sent, 0)
+            if ret < 0:
+                err = ctypes.get_errno()
+                # 已 connect 的 socket 会在本次发送上报告之前的 ICMP 端口不可达，错误读出即清除，重试一次
+                if err == errno.ECONNREFUSED and not refused:
+                    refused = True
+                    continue
+                raise OSError(err, os.strerror(err))
+            sent += ret
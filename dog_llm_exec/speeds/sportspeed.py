@@ -1,101 +1,72 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import bisect
+
 from command.udp_command import *                       # 存放各种结构体与状态数据、指令
 
+# 档位 -> (速度指令值, 前进速度 m/s, 后退速度 m/s)：档位和速度拟合公式都是固定的，模块加载时算好
+# 档位速度只是参考值，具体速度按照实际来判断
+_STRAIGHT_GEARS = {
+    gear: (val,
+           (-7.237e-09) * val ** 2 + 0.0002933 * val - 1.66,
+           (-1.5059e-08) * (-val) ** 2 - (4.1944e-04) * (-val) - 2.1804)
+    for gear, val in {1: 7000, 2: 7500, 3: 8000, 4: 8700, 5: 9000, 6: 10500}.items()
+}
+
+_TRANSLATE_GEARS = {
+    gear: (val,
+           (1.517e-05) * val - 0.1748,
+           -(1.6e-05) * (-val) - 0.2256)
+    for gear, val in {1: 14000, 2: 18000, 3: 21000, 4: 24000, 5: 27000, 6: 34000}.items()
+}
+
+
 def go_straight(long, speedgear=3, times=None, obs_void_distance=None):
-    # 档位速度只是参考值，具体速度按照实际来判断，默认速度是3档
-    speedgear_ditc = {
-        1:7000,
-        2:7500,
-        3:8000,
-        4:8700,
-        5:9000,
-        6:10500,
-    }
-
-    val = speedgear_ditc[speedgear]
+    # 默认速度是3档
+    val, forward_speed, backward_speed = _STRAIGHT_GEARS[speedgear]
     
     # 如果传入的是时间，计算出已经走过的距离,long传入9999是为在特殊情况才能会有下面的情况
     if times is not None and obs_void_distance is not None and long == 9999:
-        speed_per_second_meter = (-7.237e-09) * val ** 2 + 0.0002933 * val - 1.66
+        speed_per_second_meter = forward_speed
         # 这里要计算出避障的距离的时间消耗
         times_obs_void_distance = obs_void_distance / speed_per_second_meter
         long = abs((times - times_obs_void_distance) * speed_per_second_meter)
         return long
 
     if long < 0:
-        val = -val
-        speed_per_second_meter = (-1.5059e-08) * val ** 2 - (4.1944e-04) * val - 2.1804
-        times = abs(long / speed_per_second_meter)
-    else:
-        speed_per_second_meter = (-7.237e-09) * val ** 2 + 0.0002933 * val - 1.66
-        times = long / speed_per_second_meter
-    return [times, val]
+        return [abs(long / backward_speed), -val]
+    return [long / forward_speed, val]
 
 
 def translate_left_and_right(long, speedgear=3):
-    # 档位速度只是参考值，具体速度按照实际来判断，默认速度是3档
-    speedgear_ditc = {
-        1: 14000,
-        2: 18000,
-        3: 21000,
-        4: 24000,
-        5: 27000,
-        6: 34000,
-    }
-    val = speedgear_ditc[speedgear]
+    # 默认速度是3档
+    val, right_speed, left_speed = _TRANSLATE_GEARS[speedgear]
     if long < 0:
-        val = -val
-        speed_per_second_meter = -(1.6e-05) * val - 0.2256
-        times = abs(long / speed_per_second_meter)
-    else:
-        speed_per_second_meter = (1.517e-05) * val  - 0.1748
-        times = long / speed_per_second_meter
-    return [times, val]
+        return [abs(long / left_speed), -val]
+    return [long / right_speed, val]
+
+
+# 旋转角度(度) -> 旋转时间(秒) 的标定表，角度升序排列，供二分查找
+_REVOLVE_ANGLES = (0, 15, 30, 45, 60, 75, 90, 105, 120, 135, 150, 165, 167,
+                   185, 195, 210, 225, 240, 255, 270, 285, 300, 315, 330, 345, 360)
+_REVOLVE_TIMES = (0, 0.1, 0.2, 0.53, 0.6, 0.9, 1.3, 1.5, 1.9, 2.2, 2.3, 2.5, 2.8,
+                  2.9, 3.1, 3.4, 3.7, 4, 4.3, 4.5, 4.7, 5, 5.3, 5.6, 5.8, 5.9)
 
 
 def revolve_left_and_right(angle):
     def find_closest_output(input_value):
-        # 判断角度是否超过了360度，超过了则需要则算掉
+        # 判断角度是否超过了360度，超过了则减去整圈（原先的 input_value / (input_value % 360) 结果不对，
+        # 而且角度恰好是 360 的整数倍时会除以 0）
         if input_value > 360:
-            input_value = input_value / (input_value % 360)
-
-        # 输出到输入的映射字典
-        output_to_input_map = {
-            0: 0,
-            15: 0.1,
-            30: 0.2,
-            45: 0.53,
-            60: 0.6,
-            75: 0.9,
-            90: 1.3,
-            105: 1.5,
-            120: 1.9,
-            135: 2.2,
-            150: 2.3,
-            165: 2.5,
-            167: 2.8,
-            185: 2.9,
-            195: 3.1,
-            210: 3.4,
-            225: 3.7,
-            240: 4,
-            255: 4.3,
-            270: 4.5,
-            285: 4.7,
-            300: 5,
-            315: 5.3,
-            330: 5.6,
-            345: 5.8,
-            360: 5.9,
-        }
-        # 获取所有输出键并将其转换为列表
-        keys = list(output_to_input_map.keys())
-        # 寻找与输入值最接近的输出键
-        closest_key = min(keys, key=lambda x: abs(x - input_value))
-        # 返回与最接近键关联的输入值
-        return output_to_input_map[closest_key]
+            input_value %= 360
+
+        # 在有序的角度表上二分查找最接近的角度（距离相同时取较小的角度）
+        i = bisect.bisect_left(_REVOLVE_ANGLES, input_value)
+        if i == len(_REVOLVE_ANGLES) or (i > 0 and input_value - _REVOLVE_ANGLES[i - 1] <= _REVOLVE_ANGLES[i] - input_value):
+            i -= 1
+        # 返回与最接近角度关联的时间
+        return _REVOLVE_TIMES[i]
     
 
     times = find_closest_output(abs(angle))  # 获取时间与角度的关系
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""dog_llm_exec_server 的 HTTP 层测试（标准库 unittest，不启动执行子进程）。
+
+运行：python -m unittest discover -s dog_llm_exec/tests
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dog_llm_exec_server as server  # noqa: E402
+
+
+class _FakeService:
+    """只记录急停调用的替身，不创建执行子进程"""
+
+    def __init__(self) -> None:
+        self.stops = 0
+
+    def emergency_stop(self) -> None:
+        self.stops += 1
+
+
+class EmergencyStopTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._saved = server._SERVICE
+        self.service = _FakeService()
+        server._SERVICE = self.service
+
+    def tearDown(self) -> None:
+        server._SERVICE = self._saved
+
+    async def _post(self, raw: bytes) -> bytes:
+        srv = await asyncio.start_server(server._handle_conn, "127.0.0.1", 0)
+        port = srv.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            # 不半关闭连接：服务端必须在不等 EOF 的情况下给出响应
+            status = await asyncio.wait_for(reader.readline(), 2.0)
+            writer.close()
+            return status
+        finally:
+            srv.close()
+            await srv.wait_closed()
+
+    def test_post_without_body(self) -> None:
+        """curl -X POST .../emergency_stop：无 Content-Length、无请求体，也要立即响应"""
+        raw = b"POST /emergency_stop HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        status = asyncio.run(self._post(raw))
+        self.assertTrue(status.startswith(b"HTTP/1.1 200"), status)
+        self.assertEqual(self.service.stops, 1)
+
+
+class LongPollTest(unittest.TestCase):
+    def test_wait_logs_wakes_on_append_from_thread(self) -> None:
+        """其他线程追加日志时，挂在事件循环上的 /logs 长轮询应立即返回"""
+        logs = server.LogCollector()
+
+        async def run() -> list:
+            threading.Timer(0.05, logs.append, ("hello",)).start()
+            return await logs.wait_logs(0, 5.0)
+
+        t0 = time.monotonic()
+        self.assertEqual(asyncio.run(run()), ["hello"])
+        self.assertLess(time.monotonic() - t0, 1.0)
+
+    def test_wait_logs_timeout(self) -> None:
+        logs = server.LogCollector()
+        self.assertEqual(asyncio.run(logs.wait_logs(0, 0.05)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
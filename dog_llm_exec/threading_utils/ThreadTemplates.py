@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import heapq
 import threading
 import time
 import logging
@@ -14,6 +15,25 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 
 
+def paced_send(send, seconds, interval=0.1, *args) -> None:
+    """在调用线程内每 interval 秒调用一次 send(*args)，持续 seconds 秒。
+    send 抛出的异常（如 socket 关闭时的 OSError）不在这里吞掉，直接交给调用方处理。"""
+    interval_ns = int(interval * 1e9)
+    start_ns = time.monotonic_ns()
+    end_ns = start_ns + int(seconds * 1e9)
+    next_ns = start_ns
+    while True:
+        send(*args)
+        # 截止时间由起点累加得到，不随单次发送耗时漂移；若已超时则从当前时刻重新对齐，不补发
+        next_ns += interval_ns
+        now_ns = time.monotonic_ns()
+        if next_ns < now_ns:
+            next_ns = now_ns
+        if next_ns > end_ns:
+            return
+        time.sleep((next_ns - now_ns) / 1e9)
+
+
 class MyRepeatThread(threading.Thread):
     def __init__(self, name, action, interval, time_limit = None, *args) -> None:
         super(MyRepeatThread, self).__init__()
@@ -31,6 +51,9 @@ class MyRepeatThread(threading.Thread):
 
     def run(self) -> None:
         print(f"Starting {self.name}")
+        # 以单调时钟的整数纳秒截止时间排程：不受系统时间跳变影响，也不会因浮点误差逐周期漂移
+        interval_ns = int(self.interval * 1e9)
+        deadline_ns = time.monotonic_ns()
         while not self.stopped.is_set():
             self.current_time = time.time()
             
@@ -51,11 +74,13 @@ class MyRepeatThread(threading.Thread):
                     logging.error(f"{self.name} 执行时发生异常: {e}")
                 self.stopped.set()
 
-            # 计算需要休眠多长时间以保持固定频率
-            action_start_time = time.time()
-            elapsed_time = action_start_time - self.current_time
-            time_to_wait = max(0, self.interval - elapsed_time)
-            time.sleep(time_to_wait)
+            # 休眠到下一个周期的截止时间以保持固定频率；若本周期已超时则从当前时刻重新对齐，不补发
+            deadline_ns += interval_ns
+            remaining_ns = deadline_ns - time.monotonic_ns()
+            if remaining_ns > 0:
+                time.sleep(remaining_ns / 1e9)
+            else:
+                deadline_ns = time.monotonic_ns()
         
         self.stopped.set()  # 确保线程停止状态被设置
         logging.info(f'离开线程：{self.name}')
@@ -81,3 +106,129 @@ class MyRepeatThread(threading.Thread):
         self.current_time_start = time.time() - self.start_time
         return {attr: value for attr, value in vars(self).items()}
 
+
+class PeriodicTask:
+    """UdpScheduler 中的周期任务，接口与 MyRepeatThread 保持一致（stop/join/is_alive/print_attributes）"""
+
+    def __init__(self, scheduler, name, action, interval, time_limit=None, *args) -> None:
+        self._scheduler = scheduler
+        self.name = name
+        self.action = action
+        self.interval = interval
+        self.time_limit = time_limit
+        self.args = args
+        self.start_time = time.time()
+        self.current_time_start = 0
+        self._interval_ns = int(interval * 1e9)
+        self._time_limit_ns = None if time_limit is None else int(time_limit * 1e9)
+        self._start_ns = time.monotonic_ns()
+        self._deadline_ns = self._start_ns
+        self._cancelled = False
+        self._running = False
+        self._done = threading.Event()
+
+    def stop(self) -> None:
+        self._scheduler._cancel(self)
+
+    def join(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return not self._done.is_set()
+
+    def print_attributes(self):
+        """
+        打印对象的所有属性及其值
+        """
+        self.current_time_start = (time.monotonic_ns() - self._start_ns) / 1e9
+        return {attr: value for attr, value in vars(self).items()}
+
+
+class UdpScheduler(threading.Thread):
+    """用单个线程按截止时间堆驱动所有周期发送任务（心跳、持续移动指令等），
+    取代每个任务各开一个 MyRepeatThread 的做法。"""
+
+    def __init__(self, name="UdpScheduler") -> None:
+        super(UdpScheduler, self).__init__(name=name, daemon=True)
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = 0
+        self._stopped = False
+
+    def schedule_periodic(self, name, action, interval, time_limit=None, *args) -> PeriodicTask:
+        """立即执行一次 action，此后每 interval 秒执行一次，超过 time_limit 秒后自动结束"""
+        task = PeriodicTask(self, name, action, interval, time_limit, *args)
+        with self._cond:
+            if self._stopped:
+                task._done.set()
+                return task
+            self._push(task)
+            self._cond.notify()
+        return task
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            for _, _, task in self._heap:
+                task._done.set()
+            self._heap.clear()
+            self._cond.notify()
+
+    def _push(self, task) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (task._deadline_ns, self._seq, task))
+
+    def _cancel(self, task) -> None:
+        with self._cond:
+            task._cancelled = True
+            # 正在执行中的任务由调度线程在本次执行结束后收尾，保证 join 返回后不会再有发送
+            if not task._running:
+                task._done.set()
+            self._cond.notify()
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and not self._heap:
+                    self._cond.wait()
+                if self._stopped:
+                    break
+                deadline_ns, _, task = self._heap[0]
+                now_ns = time.monotonic_ns()
+                if deadline_ns > now_ns:
+                    self._cond.wait((deadline_ns - now_ns) / 1e9)
+                    continue
+                heapq.heappop(self._heap)
+                if task._cancelled:
+                    task._done.set()
+                    continue
+                # 如果超过时间阈值，则结束任务
+                if task._time_limit_ns is not None and now_ns - task._start_ns > task._time_limit_ns:
+                    logging.info(f'{task.name}由于超过时间阈值{task.time_limit}秒，系统自动停止！')
+                    task._done.set()
+                    continue
+                task._running = True
+
+            try:
+                task.action(*task.args)
+            except OSError:
+                logging.warning(f"{task.name} 执行时发生OSError (socket可能已关闭), 任务停止。")
+                task._cancelled = True
+            except Exception as e:
+                logging.error(f"{task.name} 执行时发生异常: {e}")
+                task._cancelled = True
+
+            with self._cond:
+                task._running = False
+                if task._cancelled or self._stopped:
+                    task._done.set()
+                    continue
+                # 下一个周期的截止时间；若已超时则从当前时刻重新对齐，不补发
+                task._deadline_ns += task._interval_ns
+                if task._deadline_ns < time.monotonic_ns():
+                    task._deadline_ns = time.monotonic_ns()
+                self._push(task)
+        logging.info(f'离开线程：{self.name}')